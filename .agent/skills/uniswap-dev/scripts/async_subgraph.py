@@ -0,0 +1,316 @@
+"""
+Asyncio Uniswap Subgraph Client
+
+Async twin of UniswapSubgraph with the same get_* surface. A semaphore caps
+the number of in-flight requests, so one event loop can keep hundreds of
+subgraph reads running without overwhelming the endpoint.
+
+Requires: pip install aiohttp
+"""
+
+import asyncio
+from typing import Dict, Iterable, List, Any, Optional
+
+import aiohttp
+
+from subgraph_query import (
+    UNISWAP_V3_MAINNET,
+    CHAIN_ENDPOINTS,
+    DEFAULT_POOL_SIZE,
+    DEFAULT_BATCH_SIZE,
+    MAX_PAGE_SIZE,
+    GET_POOL_QUERY,
+    GET_POOLS_QUERY,
+    GET_TOP_POOLS_QUERY,
+    GET_RECENT_SWAPS_QUERY,
+    GET_TOKEN_HISTORY_QUERY,
+    GET_POOL_DAY_DATA_QUERY,
+    GET_USER_POSITIONS_QUERY,
+    GET_ACTIVE_USER_POSITIONS_QUERY,
+    ITER_OWNERS_POSITIONS_QUERY,
+    ITER_ACTIVE_OWNERS_POSITIONS_QUERY,
+    GET_TOKEN_QUERY,
+    GET_TOKENS_QUERY,
+    GET_LARGE_SWAPS_QUERY,
+    GET_LARGE_SWAPS_SINCE_QUERY,
+    GET_LARGE_SWAPS_AT_TIMESTAMP_QUERY,
+    GET_PROTOCOL_STATS_QUERY,
+    SEARCH_TOKENS_QUERY,
+    FieldSet,
+    graphql_data,
+    project,
+)
+
+DEFAULT_CONCURRENCY = 32
+
+
+class AsyncUniswapSubgraph:
+    """Asyncio wrapper for Uniswap Subgraph queries
+
+    At most max_concurrency queries are in flight at once; extra callers wait
+    on the semaphore. Use as an async context manager (or await close()).
+    """
+
+    def __init__(
+        self,
+        endpoint: str = UNISWAP_V3_MAINNET,
+        max_concurrency: int = DEFAULT_CONCURRENCY,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        timeout: float = 30.0,
+        session: Optional[aiohttp.ClientSession] = None,
+    ):
+        self.endpoint = endpoint
+        self.max_concurrency = max_concurrency
+        self.pool_size = pool_size
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self._owns_session = session is None
+        self._session = session
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Lazily create the session so it binds to the running event loop"""
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit_per_host=max(self.pool_size, self.max_concurrency))
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self.timeout,
+                headers={"Content-Type": "application/json"},
+            )
+        return self._session
+
+    async def close(self) -> None:
+        """Close pooled connections (only if the session is owned by this client)"""
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self) -> "AsyncUniswapSubgraph":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def query(self, query: str, variables: Optional[Dict] = None) -> Dict[str, Any]:
+        """Execute a GraphQL query against the subgraph"""
+        async with self._semaphore:
+            async with self.session.post(
+                self.endpoint,
+                json={"query": query, "variables": variables or {}},
+            ) as response:
+                response.raise_for_status()
+                payload = await response.json()
+
+        return graphql_data(payload)
+
+    async def get_pool(self, pool_address: str, fields: FieldSet = None) -> Dict[str, Any]:
+        """Get pool information by address"""
+        query = project(GET_POOL_QUERY, fields, "Pool")
+        result = await self.query(query, {"id": pool_address.lower()})
+        return result["pool"]
+
+    async def get_pools(
+        self,
+        pool_addresses: List[str],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        fields: FieldSet = None,
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Get many pools in id_in batches, keyed by lowercase address (None if missing)"""
+        query = project(GET_POOLS_QUERY, fields, "Pool", required=("id",))
+        return await self._get_many(query, "pools", pool_addresses, batch_size)
+
+    async def get_top_pools(self, limit: int = 10, fields: FieldSet = None) -> List[Dict[str, Any]]:
+        """Get top pools by volume"""
+        query = project(GET_TOP_POOLS_QUERY, fields, "Pool")
+        result = await self.query(query, {"limit": limit})
+        return result["pools"]
+
+    async def get_recent_swaps(
+        self, pool_address: str, limit: int = 100, fields: FieldSet = None
+    ) -> List[Dict[str, Any]]:
+        """Get recent swaps for a pool"""
+        query = project(GET_RECENT_SWAPS_QUERY, fields, "Swap")
+        result = await self.query(query, {"pool": pool_address.lower(), "limit": limit})
+        return result["swaps"]
+
+    async def get_token_price_history(
+        self, token_address: str, days: int = 30, fields: FieldSet = None
+    ) -> List[Dict[str, Any]]:
+        """Get token price history"""
+        query = project(GET_TOKEN_HISTORY_QUERY, fields, "TokenDayData")
+        result = await self.query(query, {"token": token_address.lower(), "limit": days})
+        return result["tokenDayDatas"]
+
+    async def get_pool_day_data(
+        self, pool_address: str, days: int = 7, fields: FieldSet = None
+    ) -> List[Dict[str, Any]]:
+        """Get pool statistics over time"""
+        query = project(GET_POOL_DAY_DATA_QUERY, fields, "PoolDayData")
+        result = await self.query(query, {"pool": pool_address.lower(), "limit": days})
+        return result["poolDayDatas"]
+
+    async def get_user_positions(
+        self, user_address: str, active_only: bool = True, fields: FieldSet = None
+    ) -> List[Dict[str, Any]]:
+        """Get liquidity positions for a user"""
+        query = GET_ACTIVE_USER_POSITIONS_QUERY if active_only else GET_USER_POSITIONS_QUERY
+        query = project(query, fields, "Position")
+        result = await self.query(query, {"owner": user_address.lower()})
+        return result["positions"]
+
+    async def get_positions_for_owners(
+        self,
+        owner_addresses: Iterable[str],
+        active_only: bool = True,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        page_size: int = MAX_PAGE_SIZE,
+        fields: FieldSet = None,
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Get the positions of many owners, running the owner_in batches concurrently"""
+        query = ITER_ACTIVE_OWNERS_POSITIONS_QUERY if active_only else ITER_OWNERS_POSITIONS_QUERY
+        query = project(query, fields, "Position", required=("id", "owner"))
+        owners = list(dict.fromkeys(address.lower() for address in owner_addresses))
+        results: Dict[str, List[Dict[str, Any]]] = {owner: [] for owner in owners}
+        batch_size = min(batch_size, MAX_PAGE_SIZE)
+        batches = [owners[start:start + batch_size] for start in range(0, len(owners), batch_size)]
+        pages = await asyncio.gather(*(self._owner_batch(query, batch, page_size) for batch in batches))
+        for positions in pages:
+            for position in positions:
+                results[position["owner"].lower()].append(position)
+        return results
+
+    async def _owner_batch(self, query: str, owners: List[str], page_size: int) -> List[Dict[str, Any]]:
+        """Every position of one owner_in batch, paged with an id_gt cursor"""
+        positions: List[Dict[str, Any]] = []
+        after = ""
+        while True:
+            result = await self.query(query, {"owners": owners, "first": page_size, "after": after})
+            positions.extend(result["positions"])
+            if len(result["positions"]) < page_size:
+                return positions
+            after = positions[-1]["id"]
+
+    async def get_token_info(self, token_address: str, fields: FieldSet = None) -> Dict[str, Any]:
+        """Get token information and statistics"""
+        query = project(GET_TOKEN_QUERY, fields, "Token")
+        result = await self.query(query, {"id": token_address.lower()})
+        return result["token"]
+
+    async def get_tokens(
+        self,
+        token_addresses: List[str],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        fields: FieldSet = None,
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Get many tokens in id_in batches, keyed by lowercase address (None if missing)"""
+        query = project(GET_TOKENS_QUERY, fields, "Token", required=("id",))
+        return await self._get_many(query, "tokens", token_addresses, batch_size)
+
+    async def _get_many(
+        self, query: str, key: str, addresses: List[str], batch_size: int
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Fetch entities by id, running the id_in batches concurrently"""
+        ids = list(dict.fromkeys(address.lower() for address in addresses))
+        results: Dict[str, Optional[Dict[str, Any]]] = dict.fromkeys(ids)
+        batch_size = min(batch_size, MAX_PAGE_SIZE)
+        batches = [ids[start:start + batch_size] for start in range(0, len(ids), batch_size)]
+        pages = await asyncio.gather(
+            *(self.query(query, {"ids": batch, "first": len(batch)}) for batch in batches)
+        )
+        for page in pages:
+            for entity in page[key]:
+                results[entity["id"]] = entity
+        return results
+
+    async def get_large_swaps(
+        self, min_usd: float = 100000, limit: int = 10, fields: FieldSet = None
+    ) -> List[Dict[str, Any]]:
+        """Get large swaps (whale tracking)"""
+        query = project(GET_LARGE_SWAPS_QUERY, fields, "Swap")
+        result = await self.query(query, {"minUSD": str(min_usd), "limit": limit})
+        return result["swaps"]
+
+    async def get_large_swaps_since(
+        self,
+        min_usd: float,
+        since: int,
+        limit: int = MAX_PAGE_SIZE,
+        fields: FieldSet = None,
+    ) -> List[Dict[str, Any]]:
+        """Get swaps above min_usd at or after the since timestamp, oldest first"""
+        query = project(GET_LARGE_SWAPS_SINCE_QUERY, fields, "Swap", required=("id", "timestamp"))
+        result = await self.query(query, {"minUSD": str(min_usd), "since": str(since), "first": limit})
+        return result["swaps"]
+
+    async def get_large_swaps_at(
+        self,
+        min_usd: float,
+        timestamp: int,
+        after: str = "",
+        limit: int = MAX_PAGE_SIZE,
+        fields: FieldSet = None,
+    ) -> List[Dict[str, Any]]:
+        """Get swaps above min_usd at exactly timestamp with id greater than after, by id"""
+        query = project(GET_LARGE_SWAPS_AT_TIMESTAMP_QUERY, fields, "Swap", required=("id", "timestamp"))
+        result = await self.query(query, {
+            "minUSD": str(min_usd), "timestamp": str(timestamp), "after": after, "first": limit,
+        })
+        return result["swaps"]
+
+    async def get_protocol_stats(self, fields: FieldSet = None) -> Dict[str, Any]:
+        """Get overall protocol statistics"""
+        result = await self.query(project(GET_PROTOCOL_STATS_QUERY, fields, "Factory"))
+        return result["factory"]
+
+    async def search_tokens(
+        self, search_term: str, limit: int = 5, fields: FieldSet = None
+    ) -> List[Dict[str, Any]]:
+        """Search for tokens by symbol or name"""
+        query = project(SEARCH_TOKENS_QUERY, fields, "Token")
+        result = await self.query(query, {"search": search_term, "limit": limit})
+        return result["tokens"]
+
+
+# Example usage functions
+async def example_scan_pools():
+    """Example: Fetch many pools concurrently"""
+    pool_addresses = [
+        "0x88e6a0c2ddd26feeb64f039a2c41296fcb3f5640",  # USDC/WETH 0.05%
+        "0x8ad599c3a0ff1de082011efddc58f1908eb6e6d8",  # USDC/WETH 0.3%
+        "0xcbcdf9626bc03e24f779434178a73a0b4bad62ed",  # WBTC/WETH 0.3%
+    ]
+
+    async with AsyncUniswapSubgraph(max_concurrency=8) as subgraph:
+        pools = await asyncio.gather(*(subgraph.get_pool(a) for a in pool_addresses))
+
+    print("=== Pools ===")
+    for pool in pools:
+        print(f"{pool['token0']['symbol']}/{pool['token1']['symbol']}: "
+              f"TVL ${float(pool['totalValueLockedUSD']):,.2f}")
+
+
+async def example_all_chains():
+    """Example: Query protocol stats on every chain at once"""
+    clients = {chain: AsyncUniswapSubgraph(url) for chain, url in CHAIN_ENDPOINTS.items()}
+    try:
+        results = await asyncio.gather(
+            *(client.get_protocol_stats() for client in clients.values()),
+            return_exceptions=True,
+        )
+    finally:
+        await asyncio.gather(*(client.close() for client in clients.values()))
+
+    print("\n=== Protocol Statistics by Chain ===")
+    for chain, stats in zip(clients, results):
+        if isinstance(stats, Exception):
+            print(f"{chain}: error {stats}")
+        else:
+            print(f"{chain}: TVL ${float(stats['totalValueLockedUSD']):,.2f}")
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(example_scan_pools())
+        asyncio.run(example_all_chains())
+    except Exception as e:
+        print(f"Error: {e}")
@@ -0,0 +1,229 @@
+"""
+Subgraph Client Benchmarks
+
+Measures requests/sec, p50/p99 latency and peak Python memory for each
+UniswapSubgraph get_*/iter_* method, both sequentially and with N threads
+sharing one client. By default it runs against a local mock_subgraph
+server with synthetic data, so numbers are repeatable offline. Point
+--endpoint at a real subgraph to measure the network instead.
+
+Concurrent calls are not coalesced, so every call is one request. Pass
+--coalesced to add separate "+coalesce" rows measuring single-flight
+deduplication of identical concurrent calls.
+
+Usage:
+    python benchmark_subgraph.py --iterations 200 --concurrency 8
+    python benchmark_subgraph.py --latency 0.02 --only get_pool get_pools
+    python benchmark_subgraph.py --concurrency 4 --coalesced --only get_pool
+"""
+
+import argparse
+import contextlib
+import json
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from subgraph_query import UniswapSubgraph
+from mock_subgraph import MockSubgraphServer, synthetic_dataset
+
+# Calls traced under tracemalloc; kept small because tracing slows everything
+MEMORY_ITERATIONS = 5
+
+
+def build_cases(sample: Dict[str, Any]) -> Dict[str, Callable[[UniswapSubgraph], Any]]:
+    """Benchmark cases keyed by method name, each taking a client"""
+    pool, pools, token, tokens, owner = (
+        sample["pool"], sample["pools"], sample["token"], sample["tokens"], sample["owner"]
+    )
+    return {
+        "get_pool": lambda c: c.get_pool(pool),
+        "get_pools": lambda c: c.get_pools(pools),
+        "get_top_pools": lambda c: c.get_top_pools(10),
+        "get_recent_swaps": lambda c: c.get_recent_swaps(pool, 100),
+        "get_recent_swaps[price_only]": lambda c: c.get_recent_swaps(pool, 100, fields="price_only"),
+        "get_token_price_history": lambda c: c.get_token_price_history(token, 30),
+        "get_pool_day_data": lambda c: c.get_pool_day_data(pool, 7),
+        "get_user_positions": lambda c: c.get_user_positions(owner),
+        "get_token_info": lambda c: c.get_token_info(token),
+        "get_tokens": lambda c: c.get_tokens(tokens),
+        "get_large_swaps": lambda c: c.get_large_swaps(100000, 10),
+        "get_protocol_stats": lambda c: c.get_protocol_stats(),
+        "search_tokens": lambda c: c.search_tokens("US", 5),
+        "iter_swaps": lambda c: sum(1 for _ in c.iter_swaps(pool)),
+        "iter_swaps[stream]": lambda c: sum(1 for _ in c.iter_swaps(pool, stream=True)),
+    }
+
+
+def sample_ids(dataset: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """Pick the ids the cases query from a (mock) dataset"""
+    return {
+        "pool": dataset["pools"][0]["id"],
+        "pools": [p["id"] for p in dataset["pools"]],
+        "token": dataset["tokens"][0]["id"],
+        "tokens": [t["id"] for t in dataset["tokens"]],
+        "owner": dataset["positions"][0]["owner"],
+    }
+
+
+# Mainnet ids used when benchmarking a live endpoint
+MAINNET_SAMPLE = {
+    "pool": "0x88e6a0c2ddd26feeb64f039a2c41296fcb3f5640",
+    "pools": [
+        "0x88e6a0c2ddd26feeb64f039a2c41296fcb3f5640",
+        "0x8ad599c3a0ff1de082011efddc58f1908eb6e6d8",
+        "0xcbcdf9626bc03e24f779434178a73a0b4bad62ed",
+    ],
+    "token": "0xa0b86991c6218b36c1d19d4a2e9eb0ce3606eb48",
+    "tokens": [
+        "0xa0b86991c6218b36c1d19d4a2e9eb0ce3606eb48",
+        "0xc02aaa39b223fe8d0a5e5c4f27ead9083c756cc2",
+    ],
+    "owner": "0x0000000000000000000000000000000000000000",
+}
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def run_case(
+    client: UniswapSubgraph,
+    call: Callable[[UniswapSubgraph], Any],
+    iterations: int,
+    concurrency: int = 1,
+) -> Dict[str, Any]:
+    """Time iterations calls (sequentially or on concurrency threads)
+
+    Returns req/s (calls and HTTP requests), p50/p99 latency in ms, the error
+    count and the tracemalloc peak of a short separate run in KiB.
+    """
+    def timed(_):
+        started = time.perf_counter()
+        try:
+            call(client)
+            return time.perf_counter() - started, None
+        except Exception as e:
+            return time.perf_counter() - started, e
+
+    call(client)  # warm up connections and query compilation
+
+    requests_before = client.stats["requests"]
+    started = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            outcomes = list(executor.map(timed, range(iterations)))
+    else:
+        outcomes = [timed(i) for i in range(iterations)]
+    elapsed = time.perf_counter() - started
+    http_requests = client.stats["requests"] - requests_before
+
+    latencies = sorted(seconds for seconds, _ in outcomes)
+    errors = sum(1 for _, error in outcomes if error is not None)
+
+    tracemalloc.start()
+    for _ in range(MEMORY_ITERATIONS):
+        call(client)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "calls_per_sec": iterations / elapsed if elapsed else 0.0,
+        "requests_per_sec": http_requests / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "errors": errors,
+        "peak_kib": peak / 1024,
+    }
+
+
+def run_benchmarks(
+    endpoint: str,
+    sample: Dict[str, Any],
+    iterations: int = 100,
+    concurrency: int = 8,
+    only: Optional[List[str]] = None,
+    coalesced: bool = False,
+    **client_options: Any,
+) -> List[Dict[str, Any]]:
+    """Run every case in sync and concurrent mode; one result row per case and mode
+
+    coalesced=True adds a concurrent mode on a client with single-flight
+    coalescing, labelled "+coalesce" so its calls/s are never mixed with
+    the uncoalesced rows.
+    """
+    cases = build_cases(sample)
+    modes = [("sync", 1, False)]
+    if concurrency > 1:
+        modes.append((f"threads={concurrency}", concurrency, False))
+        if coalesced:
+            modes.append((f"threads={concurrency}+coalesce", concurrency, True))
+    rows = []
+    with contextlib.ExitStack() as stack:
+        clients = {
+            coalesce: stack.enter_context(UniswapSubgraph(
+                endpoint, pool_size=max(concurrency, 1), coalesce=coalesce, **client_options
+            ))
+            for coalesce in {coalesce for _, _, coalesce in modes}
+        }
+        for name, call in cases.items():
+            if only and name not in only:
+                continue
+            for mode, workers, coalesce in modes:
+                result = run_case(clients[coalesce], call, iterations, workers)
+                rows.append({"method": name, "mode": mode, **result})
+    return rows
+
+
+def print_table(rows: List[Dict[str, Any]]) -> None:
+    print(f"{'method':30} {'mode':18} {'calls/s':>9} {'req/s':>9} "
+          f"{'p50 ms':>8} {'p99 ms':>8} {'peak KiB':>9} {'errors':>6}")
+    for row in rows:
+        print(f"{row['method']:30} {row['mode']:18} {row['calls_per_sec']:9.1f} "
+              f"{row['requests_per_sec']:9.1f} {row['p50_ms']:8.2f} {row['p99_ms']:8.2f} "
+              f"{row['peak_kib']:9.1f} {row['errors']:6d}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark UniswapSubgraph methods")
+    parser.add_argument("--endpoint", help="benchmark a live subgraph instead of the local mock")
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.0, help="mock server latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="mock server 503 rate")
+    parser.add_argument("--pools", type=int, default=20, help="synthetic pools in the mock")
+    parser.add_argument("--swaps-per-pool", type=int, default=2000)
+    parser.add_argument("--only", nargs="*", help="method names to run")
+    parser.add_argument("--coalesced", action="store_true",
+                        help="add labelled rows with single-flight coalescing on")
+    parser.add_argument("--json", action="store_true", help="print JSON rows instead of a table")
+    args = parser.parse_args()
+
+    if args.endpoint:
+        rows = run_benchmarks(
+            args.endpoint, MAINNET_SAMPLE, args.iterations, args.concurrency, args.only, args.coalesced
+        )
+    else:
+        dataset = synthetic_dataset(pools=args.pools, swaps_per_pool=args.swaps_per_pool)
+        with MockSubgraphServer(dataset, latency=args.latency, error_rate=args.error_rate) as server:
+            rows = run_benchmarks(
+                server.url, sample_ids(dataset), args.iterations, args.concurrency, args.only,
+                args.coalesced,
+            )
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print_table(rows)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"Error: {e}")
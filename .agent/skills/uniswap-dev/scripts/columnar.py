@@ -0,0 +1,296 @@
+"""
+Columnar Decoding of Subgraph Results
+
+The subgraph returns every numeric field as a string inside nested dicts.
+This module decodes pages of swaps, day data and pools into typed NumPy
+columns instead: float64 for decimal amounts, int64/int32 for timestamps,
+blocks and ticks, and fixed-width uint64 limbs for the uint128/uint160
+fields (liquidity, sqrtPrice, sqrtPriceX96) so they stay exact.
+
+Requires: pip install numpy
+"""
+
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from subgraph_query import MAX_PAGE_SIZE, UniswapSubgraph
+
+_LIMB_BITS = 64
+_LIMB_MASK = (1 << _LIMB_BITS) - 1
+
+
+class BigUIntColumn:
+    """Exact unsigned big-integer column stored as little-endian uint64 limbs
+
+    A uint160 value takes 3 limbs (24 bytes) instead of a ~70 byte Python
+    int. Use to_float() for vectorized math and item access for exact values.
+    """
+
+    def __init__(self, limbs: np.ndarray):
+        self.limbs = limbs
+
+    @classmethod
+    def from_values(cls, values: Iterable[Any], bits: int) -> "BigUIntColumn":
+        """Build a column from decimal strings or ints (None decodes as 0)"""
+        width = -(-bits // _LIMB_BITS)
+        rows = [_split_limbs(int(v) if v is not None else 0, width) for v in values]
+        limbs = np.array(rows, dtype=np.uint64).reshape(len(rows), width)
+        return cls(limbs)
+
+    @property
+    def nbytes(self) -> int:
+        return self.limbs.nbytes
+
+    def __len__(self) -> int:
+        return self.limbs.shape[0]
+
+    def __getitem__(self, index: int) -> int:
+        value = 0
+        for limb in reversed(self.limbs[index].tolist()):
+            value = (value << _LIMB_BITS) | limb
+        return value
+
+    def to_ints(self) -> List[int]:
+        """Exact Python ints for every row"""
+        return [self[i] for i in range(len(self))]
+
+    def to_float(self) -> np.ndarray:
+        """float64 approximation of every row, computed without Python loops"""
+        result = np.zeros(len(self), dtype=np.float64)
+        for i in reversed(range(self.limbs.shape[1])):
+            result = result * 2.0**_LIMB_BITS + self.limbs[:, i].astype(np.float64)
+        return result
+
+    def take(self, indices: np.ndarray) -> "BigUIntColumn":
+        return BigUIntColumn(self.limbs[indices])
+
+    @staticmethod
+    def concat(columns: List["BigUIntColumn"]) -> "BigUIntColumn":
+        return BigUIntColumn(np.concatenate([c.limbs for c in columns]))
+
+
+def _split_limbs(value: int, width: int) -> Tuple[int, ...]:
+    """Split a non-negative int into width little-endian 64-bit limbs"""
+    if value < 0 or value >> (width * _LIMB_BITS):
+        raise ValueError(f"{value} does not fit in {width * _LIMB_BITS} bits")
+    return tuple((value >> (_LIMB_BITS * i)) & _LIMB_MASK for i in range(width))
+
+
+# Column schemas: name -> (type, dotted path in the record)
+# Types: float64, int64, int32, str, uint128, uint160
+SWAP_SCHEMA = {
+    "id": ("str", "id"),
+    "timestamp": ("int64", "timestamp"),
+    "block": ("int64", "transaction.blockNumber"),
+    "amount0": ("float64", "amount0"),
+    "amount1": ("float64", "amount1"),
+    "amountUSD": ("float64", "amountUSD"),
+    "sqrtPriceX96": ("uint160", "sqrtPriceX96"),
+    "tick": ("int32", "tick"),
+}
+
+POOL_DAY_DATA_SCHEMA = {
+    "date": ("int64", "date"),
+    "volumeUSD": ("float64", "volumeUSD"),
+    "tvlUSD": ("float64", "tvlUSD"),
+    "feesUSD": ("float64", "feesUSD"),
+    "txCount": ("int64", "txCount"),
+    "open": ("float64", "open"),
+    "high": ("float64", "high"),
+    "low": ("float64", "low"),
+    "close": ("float64", "close"),
+}
+
+TOKEN_DAY_DATA_SCHEMA = {
+    "date": ("int64", "date"),
+    "priceUSD": ("float64", "priceUSD"),
+    "volumeUSD": ("float64", "volumeUSD"),
+    "totalValueLockedUSD": ("float64", "totalValueLockedUSD"),
+    "open": ("float64", "open"),
+    "high": ("float64", "high"),
+    "low": ("float64", "low"),
+    "close": ("float64", "close"),
+}
+
+POOL_SCHEMA = {
+    "id": ("str", "id"),
+    "feeTier": ("int32", "feeTier"),
+    "liquidity": ("uint128", "liquidity"),
+    "sqrtPrice": ("uint160", "sqrtPrice"),
+    "tick": ("int32", "tick"),
+    "token0Decimals": ("int32", "token0.decimals"),
+    "token1Decimals": ("int32", "token1.decimals"),
+    "totalValueLockedUSD": ("float64", "totalValueLockedUSD"),
+}
+
+POSITION_SCHEMA = {
+    "id": ("str", "id"),
+    "owner": ("str", "owner"),
+    "pool": ("str", "pool.id"),
+    "liquidity": ("uint128", "liquidity"),
+    "tickLower": ("int32", "tickLower.tickIdx"),
+    "tickUpper": ("int32", "tickUpper.tickIdx"),
+    "depositedToken0": ("float64", "depositedToken0"),
+    "depositedToken1": ("float64", "depositedToken1"),
+    "withdrawnToken0": ("float64", "withdrawnToken0"),
+    "withdrawnToken1": ("float64", "withdrawnToken1"),
+    "collectedFeesToken0": ("float64", "collectedFeesToken0"),
+    "collectedFeesToken1": ("float64", "collectedFeesToken1"),
+}
+
+_BIG_BITS = {"uint128": 128, "uint160": 160}
+
+
+class Columns:
+    """A batch of decoded records: column name -> NumPy array or BigUIntColumn"""
+
+    def __init__(self, columns: Dict[str, Any]):
+        self.columns = columns
+
+    def __getitem__(self, name: str) -> Any:
+        return self.columns[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    def keys(self) -> List[str]:
+        return list(self.columns)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory footprint (string columns count pointer size only)"""
+        return sum(column.nbytes for column in self.columns.values())
+
+    def take(self, indices: np.ndarray) -> "Columns":
+        """Select rows by index array or boolean mask"""
+        indices = np.asarray(indices)
+        if indices.dtype == bool:
+            indices = np.flatnonzero(indices)
+        return Columns({name: column.take(indices) for name, column in self.columns.items()})
+
+    @staticmethod
+    def concat(batches: List["Columns"]) -> "Columns":
+        """Concatenate batches that share a schema"""
+        if not batches:
+            return Columns({})
+        merged = {}
+        for name, first in batches[0].columns.items():
+            parts = [batch.columns[name] for batch in batches]
+            if isinstance(first, BigUIntColumn):
+                merged[name] = BigUIntColumn.concat(parts)
+            else:
+                merged[name] = np.concatenate(parts)
+        return Columns(merged)
+
+
+def _get(record: Dict[str, Any], path: List[str]) -> Any:
+    for part in path:
+        if record is None:
+            return None
+        record = record.get(part)
+    return record
+
+
+def decode(records: List[Dict[str, Any]], schema: Dict[str, Tuple[str, str]]) -> Columns:
+    """Decode a list of subgraph records into typed columns"""
+    count = len(records)
+    columns: Dict[str, Any] = {}
+    for name, (kind, path) in schema.items():
+        parts = path.split(".")
+        values = (_get(record, parts) for record in records)
+        if kind in _BIG_BITS:
+            columns[name] = BigUIntColumn.from_values(values, _BIG_BITS[kind])
+        elif kind == "str":
+            columns[name] = np.array(list(values), dtype=object)
+        elif kind == "float64":
+            columns[name] = np.fromiter(
+                (float(v) if v is not None else np.nan for v in values), np.float64, count
+            )
+        else:
+            columns[name] = np.fromiter(
+                (int(v) if v is not None else 0 for v in values), np.dtype(kind), count
+            )
+    return Columns(columns)
+
+
+def decode_swaps(swaps: List[Dict[str, Any]]) -> Columns:
+    """Decode swaps (get_recent_swaps / iter_swaps) into columns"""
+    return decode(swaps, SWAP_SCHEMA)
+
+
+def decode_pool_day_data(day_datas: List[Dict[str, Any]]) -> Columns:
+    """Decode poolDayDatas into columns"""
+    return decode(day_datas, POOL_DAY_DATA_SCHEMA)
+
+
+def decode_token_day_data(day_datas: List[Dict[str, Any]]) -> Columns:
+    """Decode tokenDayDatas into columns"""
+    return decode(day_datas, TOKEN_DAY_DATA_SCHEMA)
+
+
+def decode_pools(pools: List[Dict[str, Any]]) -> Columns:
+    """Decode pools (get_pool / get_pools values) into columns"""
+    return decode(pools, POOL_SCHEMA)
+
+
+def decode_positions(positions: List[Dict[str, Any]]) -> Columns:
+    """Decode positions (get_user_positions / get_positions_for_owners values) into columns"""
+    return decode(positions, POSITION_SCHEMA)
+
+
+def iter_column_batches(
+    records: Iterable[Dict[str, Any]],
+    schema: Dict[str, Tuple[str, str]],
+    batch_size: int = MAX_PAGE_SIZE,
+) -> Iterator[Columns]:
+    """Decode a record stream (e.g. an iter_* generator) into column batches"""
+    batch: List[Dict[str, Any]] = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield decode(batch, schema)
+            batch = []
+    if batch:
+        yield decode(batch, schema)
+
+
+def load_swaps(
+    subgraph: UniswapSubgraph,
+    pool_address: str,
+    since: Optional[int] = None,
+    before: Optional[int] = None,
+) -> Columns:
+    """Load a pool's swaps in a time window as one set of columns"""
+    batches = iter_column_batches(
+        subgraph.iter_swaps(pool_address, since=since, before=before), SWAP_SCHEMA
+    )
+    return Columns.concat(list(batches))
+
+
+# Example usage functions
+def example_columnar_swaps():
+    """Example: Vectorized stats over a day of swaps"""
+    pool_address = "0x88e6a0c2ddd26feeb64f039a2c41296fcb3f5640"
+
+    with UniswapSubgraph() as subgraph:
+        swaps = load_swaps(subgraph, pool_address, since=int(time.time()) - 86400)
+
+    print("=== Columnar Swaps (24h) ===")
+    print(f"Swaps: {len(swaps)} ({swaps.nbytes / 1024:,.1f} KiB)")
+    if len(swaps):
+        print(f"Volume: ${swaps['amountUSD'].sum():,.2f}")
+        print(f"Median size: ${np.median(swaps['amountUSD']):,.2f}")
+        print(f"Tick range: {swaps['tick'].min()} .. {swaps['tick'].max()}")
+        print(f"Latest sqrtPriceX96: {swaps['sqrtPriceX96'][0]}")
+
+
+if __name__ == "__main__":
+    try:
+        example_columnar_swaps()
+    except Exception as e:
+        print(f"Error: {e}")
@@ -0,0 +1,303 @@
+"""
+Persistent History Store for Uniswap Subgraph Data
+
+Swaps and poolDayDatas older than a finality horizon never change, so they
+only need to be downloaded once. HistoryStore keeps those finalized records
+in a local SQLite database together with the time range each pool is known
+to be complete for. HistoricalSubgraph answers get_recent_swaps and
+get_pool_day_data from that store and only goes to the network for the
+unfinalized tail (and for history older than anything stored so far).
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from subgraph_query import MAX_PAGE_SIZE, UniswapSubgraph
+
+# Records older than this many seconds are treated as final (reorgs and
+# indexing lag are far shorter on every supported chain)
+DEFAULT_FINALITY_SECONDS = 3600
+DAY_SECONDS = 86400
+
+SWAPS = "swaps"
+POOL_DAY_DATAS = "poolDayDatas"
+
+# kind -> (table, ordering column)
+_TABLES = {
+    SWAPS: ("swaps", "timestamp"),
+    POOL_DAY_DATAS: ("pool_day_datas", "date"),
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS swaps (
+    pool TEXT NOT NULL,
+    id TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    record TEXT NOT NULL,
+    PRIMARY KEY (pool, id)
+);
+CREATE INDEX IF NOT EXISTS swaps_by_time ON swaps (pool, timestamp);
+
+CREATE TABLE IF NOT EXISTS pool_day_datas (
+    pool TEXT NOT NULL,
+    date INTEGER NOT NULL,
+    record TEXT NOT NULL,
+    PRIMARY KEY (pool, date)
+);
+
+-- Every record of `kind` for `pool` with low <= time <= high is stored
+CREATE TABLE IF NOT EXISTS coverage (
+    kind TEXT NOT NULL,
+    pool TEXT NOT NULL,
+    low INTEGER NOT NULL,
+    high INTEGER NOT NULL,
+    PRIMARY KEY (kind, pool)
+);
+
+-- Newest swap appended by the incremental sync, per pool
+CREATE TABLE IF NOT EXISTS sync_state (
+    pool TEXT PRIMARY KEY,
+    timestamp INTEGER NOT NULL,
+    block INTEGER NOT NULL,
+    last_id TEXT NOT NULL
+);
+"""
+
+
+class HistoryStore:
+    """SQLite-backed store of finalized swaps and pool day data"""
+
+    def __init__(self, path: str = "uniswap_history.sqlite3"):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        """Close the database connection"""
+        self._conn.close()
+
+    def __enter__(self) -> "HistoryStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def coverage(self, kind: str, pool: str) -> Optional[Tuple[int, int]]:
+        """Return the (low, high) time range stored completely for a pool"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT low, high FROM coverage WHERE kind = ? AND pool = ?", (kind, pool)
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def set_coverage(self, kind: str, pool: str, low: int, high: int) -> None:
+        """Record that every record of kind in [low, high] is stored"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO coverage (kind, pool, low, high) VALUES (?, ?, ?, ?)",
+                (kind, pool, low, high),
+            )
+
+    def add_swaps(self, pool: str, swaps: List[Dict[str, Any]]) -> None:
+        """Insert swaps, ignoring ids that are already stored"""
+        rows = [(pool, s["id"], int(s["timestamp"]), json.dumps(s)) for s in swaps]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO swaps (pool, id, timestamp, record) VALUES (?, ?, ?, ?)", rows
+            )
+
+    def add_pool_day_data(self, pool: str, day_datas: List[Dict[str, Any]]) -> None:
+        """Insert pool day data, ignoring dates that are already stored"""
+        rows = [(pool, int(d["date"]), json.dumps(d)) for d in day_datas]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO pool_day_datas (pool, date, record) VALUES (?, ?, ?)", rows
+            )
+
+    def swap_ids_at(self, pool: str, timestamp: int) -> List[str]:
+        """Ids of stored swaps with exactly this timestamp"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM swaps WHERE pool = ? AND timestamp = ?", (pool, timestamp)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def high_water_mark(self, pool: str) -> Optional[Dict[str, Any]]:
+        """Return the sync high-water mark (timestamp, block, last_id) for a pool"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT timestamp, block, last_id FROM sync_state WHERE pool = ?", (pool,)
+            ).fetchone()
+        return {"timestamp": row[0], "block": row[1], "last_id": row[2]} if row else None
+
+    def set_high_water_mark(self, pool: str, timestamp: int, block: int, last_id: str) -> None:
+        """Persist the sync high-water mark for a pool"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sync_state (pool, timestamp, block, last_id) VALUES (?, ?, ?, ?)",
+                (pool, timestamp, block, last_id),
+            )
+
+    def add(self, kind: str, pool: str, records: List[Dict[str, Any]]) -> None:
+        """Insert records of the given kind"""
+        if kind == SWAPS:
+            self.add_swaps(pool, records)
+        else:
+            self.add_pool_day_data(pool, records)
+
+    def read(
+        self, kind: str, pool: str, low: int, high: int, limit: int
+    ) -> List[Dict[str, Any]]:
+        """Read up to limit records with low <= time <= high, newest first"""
+        table, column = _TABLES[kind]
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT record FROM {table} WHERE pool = ? AND {column} BETWEEN ? AND ? "
+                f"ORDER BY {column} DESC LIMIT ?",
+                (pool, low, high, limit),
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+
+class HistoricalSubgraph:
+    """Serve swap and day-data history from a HistoryStore where possible
+
+    Only records older than the finality horizon are persisted. Each call
+    fetches from the network whatever is newer than the stored range, then
+    fills the rest of the request from disk, and falls back to the network
+    again only when asked for history older than anything stored.
+    """
+
+    def __init__(
+        self,
+        subgraph: UniswapSubgraph,
+        store: HistoryStore,
+        finality_seconds: int = DEFAULT_FINALITY_SECONDS,
+    ):
+        self.subgraph = subgraph
+        self.store = store
+        self.finality_seconds = finality_seconds
+
+    def get_recent_swaps(
+        self, pool_address: str, limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """Get recent swaps for a pool"""
+        horizon = int(time.time()) - self.finality_seconds
+        return self._read_through(
+            SWAPS,
+            pool_address.lower(),
+            limit,
+            horizon,
+            self.subgraph.iter_swaps,
+            lambda swap: int(swap["timestamp"]),
+        )
+
+    def get_pool_day_data(
+        self, pool_address: str, days: int = 7
+    ) -> List[Dict[str, Any]]:
+        """Get pool statistics over time"""
+        # A day is final once the whole day lies before the horizon
+        horizon = int(time.time()) - self.finality_seconds - DAY_SECONDS
+        return self._read_through(
+            POOL_DAY_DATAS,
+            pool_address.lower(),
+            days,
+            horizon,
+            self.subgraph.iter_pool_day_data,
+            lambda day: int(day["date"]),
+        )
+
+    def _read_through(
+        self,
+        kind: str,
+        pool: str,
+        limit: int,
+        horizon: int,
+        iterate: Callable[..., Iterator[Dict[str, Any]]],
+        time_of: Callable[[Dict[str, Any]], int],
+    ) -> List[Dict[str, Any]]:
+        """Return the newest limit records, using disk for the covered range"""
+        if limit <= 0:
+            return []
+        page_size = min(MAX_PAGE_SIZE, max(limit, 100))
+        covered = self.store.coverage(kind, pool)
+
+        # 1. Everything newer than the stored range comes from the network
+        since = covered[1] + 1 if covered else 0
+        newest, complete = _take(iterate(pool, since=since, page_size=page_size), limit)
+        if complete:
+            final = [r for r in newest if time_of(r) <= horizon]
+            low = covered[0] if covered else 0
+            high = max(covered[1], horizon) if covered else horizon
+        elif not covered:
+            # Only (oldest fetched, horizon] is known complete; the oldest
+            # timestamp may have more records we did not read
+            oldest = time_of(newest[-1])
+            final = [r for r in newest if oldest < time_of(r) <= horizon]
+            low, high = oldest + 1, horizon
+        else:
+            # Unread records lie between these and the stored range, which
+            # holds a single span: store nothing rather than leave a gap
+            return newest
+        self.store.add(kind, pool, final)
+        if low <= high:
+            self.store.set_coverage(kind, pool, low, high)
+        if not complete or not covered:
+            return newest
+
+        # 2. The previously stored range is served from disk
+        remaining = limit - len(newest)
+        stored = self.store.read(kind, pool, covered[0], covered[1], remaining)
+        results = newest + stored
+        remaining -= len(stored)
+        if remaining <= 0 or covered[0] <= 0:
+            return results
+
+        # 3. Older history than anything stored: fetch it and extend the range
+        older, complete = _take(
+            iterate(pool, before=covered[0], page_size=page_size), remaining
+        )
+        low = 0 if complete else time_of(older[-1]) + 1
+        self.store.add(kind, pool, [r for r in older if time_of(r) >= low])
+        self.store.set_coverage(kind, pool, low, high)
+        return results + older
+
+
+def _take(records: Iterator[Dict[str, Any]], limit: int) -> Tuple[List[Dict[str, Any]], bool]:
+    """Take up to limit records; the flag is True if the iterator was exhausted"""
+    taken = []
+    for record in records:
+        if len(taken) == limit:
+            return taken, False
+        taken.append(record)
+    return taken, True
+
+
+# Example usage functions
+def example_backtest_history():
+    """Example: Load swap history, served from disk on repeat runs"""
+    pool_address = "0x88e6a0c2ddd26feeb64f039a2c41296fcb3f5640"
+
+    with UniswapSubgraph() as subgraph, HistoryStore() as store:
+        history = HistoricalSubgraph(subgraph, store)
+
+        started = time.perf_counter()
+        swaps = history.get_recent_swaps(pool_address, limit=5000)
+        days = history.get_pool_day_data(pool_address, days=365)
+        elapsed = time.perf_counter() - started
+
+        print("=== Historical Data ===")
+        print(f"Swaps: {len(swaps)}, Day data rows: {len(days)} ({elapsed:.2f}s)")
+        print(f"Stored swap range: {store.coverage(SWAPS, pool_address)}")
+
+
+if __name__ == "__main__":
+    try:
+        example_backtest_history()
+    except Exception as e:
+        print(f"Error: {e}")
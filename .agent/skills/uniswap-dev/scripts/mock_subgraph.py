@@ -0,0 +1,580 @@
+"""
+Local Mock Uniswap Subgraph Server
+
+A stand-in GraphQL endpoint that serves recorded or synthetic pools,
+tokens, swaps, day data and positions, so UniswapSubgraph can be developed
+and benchmarked offline. It understands the subset of GraphQL the client
+sends: one root field with first/skip/orderBy/orderDirection/where/id
+arguments, nested selections, fragments and the _meta block. Artificial
+latency and error injection make retry and hedging behaviour measurable.
+
+Usage:
+    python mock_subgraph.py --port 8000 --latency 0.05 --error-rate 0.01
+"""
+
+import argparse
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+# Root list fields -> collection name, and relation fields -> collection they reference
+COLLECTIONS = {
+    "pools": "pools",
+    "tokens": "tokens",
+    "swaps": "swaps",
+    "poolDayDatas": "poolDayDatas",
+    "tokenDayDatas": "tokenDayDatas",
+    "positions": "positions",
+    "factories": "factories",
+}
+SINGULAR = {
+    "pool": "pools",
+    "token": "tokens",
+    "swap": "swaps",
+    "position": "positions",
+    "factory": "factories",
+}
+RELATIONS = {"pool": "pools", "token": "tokens", "token0": "tokens", "token1": "tokens"}
+
+# Fields filtered with equality often enough to be worth an index
+INDEXED_FIELDS = ("pool", "token", "owner")
+
+FACTORY_ADDRESS = "0x1f98431c8ad98523631ae4a59f267346ea31f984"
+DAY_SECONDS = 86400
+
+
+# --- Query parsing -----------------------------------------------------------
+
+_TOKEN = re.compile(r'"(?:[^"\\]|\\.)*"|\.\.\.|\$?\w+|-?\d+(?:\.\d+)?|[{}()\[\]:!,@]')
+
+
+class _Parser:
+    """Recursive-descent parser for the GraphQL subset the client uses"""
+
+    def __init__(self, text: str):
+        self.tokens = [t for t in _TOKEN.findall(text) if t != ","]
+        self.index = 0
+
+    def peek(self) -> Optional[str]:
+        return self.tokens[self.index] if self.index < len(self.tokens) else None
+
+    def take(self, expected: Optional[str] = None) -> str:
+        token = self.peek()
+        if token is None or (expected is not None and token != expected):
+            raise ValueError(f"Expected {expected or 'token'}, got {token}")
+        self.index += 1
+        return token
+
+    def document(self) -> Tuple[List[Dict[str, Any]], Dict[str, List[Dict[str, Any]]]]:
+        """Return (operation selection, fragments by name)"""
+        operation: List[Dict[str, Any]] = []
+        fragments: Dict[str, List[Dict[str, Any]]] = {}
+        while self.peek() is not None:
+            token = self.take()
+            if token == "fragment":
+                name = self.take()
+                self.take("on")
+                self.take()
+                fragments[name] = self.selection()
+            elif token == "{":
+                self.index -= 1
+                operation = self.selection()
+            elif token == "(":
+                self._skip_variable_definitions()
+        return operation, fragments
+
+    def _skip_variable_definitions(self) -> None:
+        depth = 1
+        while depth:
+            token = self.take()
+            depth += token == "("
+            depth -= token == ")"
+
+    def selection(self) -> List[Dict[str, Any]]:
+        self.take("{")
+        fields = []
+        while self.peek() != "}":
+            if self.peek() == "...":
+                self.take()
+                fields.append({"spread": self.take()})
+                continue
+            name = self.take()
+            alias = None
+            if self.peek() == ":":
+                self.take()
+                alias, name = name, self.take()
+            args = self.arguments() if self.peek() == "(" else {}
+            children = self.selection() if self.peek() == "{" else None
+            fields.append({"name": name, "alias": alias or name, "args": args, "children": children})
+        self.take("}")
+        return fields
+
+    def arguments(self) -> Dict[str, Any]:
+        self.take("(")
+        args = {}
+        while self.peek() != ")":
+            name = self.take()
+            self.take(":")
+            args[name] = self.value()
+        self.take(")")
+        return args
+
+    def value(self) -> Any:
+        token = self.take()
+        if token == "{":
+            obj = {}
+            while self.peek() != "}":
+                name = self.take()
+                self.take(":")
+                obj[name] = self.value()
+            self.take("}")
+            return obj
+        if token == "[":
+            items = []
+            while self.peek() != "]":
+                items.append(self.value())
+            self.take("]")
+            return items
+        if token.startswith('"'):
+            return json.loads(token)
+        if token.startswith("$"):
+            return ("var", token[1:])
+        if token in ("true", "false"):
+            return token == "true"
+        if token == "null":
+            return None
+        return token  # numbers and enum values stay as strings
+
+
+def _bind(value: Any, variables: Dict[str, Any]) -> Any:
+    """Substitute $variables inside a parsed argument value"""
+    if isinstance(value, tuple) and value and value[0] == "var":
+        return variables.get(value[1])
+    if isinstance(value, dict):
+        return {k: _bind(v, variables) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_bind(v, variables) for v in value]
+    return value
+
+
+# --- Data evaluation ---------------------------------------------------------
+
+def _ref_id(value: Any) -> Any:
+    return value["id"] if isinstance(value, dict) else value
+
+
+def _compare_key(field: str, value: Any) -> Tuple[int, float, str]:
+    """Sort/compare key: ids compare as strings, numeric strings as numbers"""
+    value = _ref_id(value)
+    if field != "id" and value is not None:
+        try:
+            return (0, float(value), "")
+        except (TypeError, ValueError):
+            pass
+    return (1, 0.0, str(value).lower())
+
+
+# Filter suffixes, longest first so "_not_in" wins over "_in"
+_FILTER_OPS = ("contains_nocase", "contains", "not_in", "gte", "lte", "not", "gt", "lt", "in")
+
+
+def _split_condition(condition: str) -> Tuple[str, str]:
+    """Split "amountUSD_gte" into ("amountUSD", "gte"); plain fields get an empty op"""
+    for op in _FILTER_OPS:
+        if condition.endswith("_" + op):
+            return condition[:-len(op) - 1], op
+    return condition, ""
+
+
+def _matches(entity: Dict[str, Any], where: Dict[str, Any]) -> bool:
+    for condition, expected in where.items():
+        field, op = _split_condition(condition)
+        actual = entity.get(field)
+        if op == "contains_nocase":
+            if str(expected).lower() not in str(actual).lower():
+                return False
+            continue
+        if op == "contains":
+            if str(expected) not in str(actual):
+                return False
+            continue
+        if op in ("in", "not_in"):
+            wanted = {str(_ref_id(v)).lower() for v in expected or []}
+            if (str(_ref_id(actual)).lower() in wanted) != (op == "in"):
+                return False
+            continue
+        a, b = _compare_key(field, actual), _compare_key(field, expected)
+        ok = {
+            "": a == b, "not": a != b, "gt": a > b, "gte": a >= b, "lt": a < b, "lte": a <= b,
+        }[op]
+        if not ok:
+            return False
+    return True
+
+
+class MockSubgraph:
+    """In-memory dataset that answers parsed GraphQL queries"""
+
+    def __init__(self, dataset: Dict[str, List[Dict[str, Any]]], block_number: int = 20_000_000):
+        self.collections = {name: list(dataset.get(name, [])) for name in COLLECTIONS.values()}
+        self.by_id = {
+            name: {str(e["id"]).lower(): e for e in entities}
+            for name, entities in self.collections.items()
+        }
+        self.block_number = block_number
+        self._indexes: Dict[Tuple[str, str], Dict[str, List[Dict[str, Any]]]] = {}
+        self._sorted: Dict[Tuple[str, Optional[str], Optional[str], str], List[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self._parsed: Dict[str, Tuple[List[Dict[str, Any]], Dict[str, List[Dict[str, Any]]]]] = {}
+
+    def execute(self, query: str, variables: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Execute a query and return a GraphQL response payload"""
+        try:
+            with self._lock:
+                parsed = self._parsed.get(query)
+            if parsed is None:
+                parsed = _Parser(query).document()
+                with self._lock:
+                    self._parsed[query] = parsed
+            selection, fragments = parsed
+            data = {}
+            for field in self._expand(selection, fragments):
+                data[field["alias"]] = self._root(field, variables or {}, fragments)
+            return {"data": data}
+        except Exception as e:
+            return {"errors": [{"message": f"{type(e).__name__}: {e}"}]}
+
+    def _expand(self, selection, fragments) -> List[Dict[str, Any]]:
+        fields = []
+        for field in selection:
+            if "spread" in field:
+                fields.extend(self._expand(fragments[field["spread"]], fragments))
+            else:
+                fields.append(field)
+        return fields
+
+    def _root(self, field, variables, fragments) -> Any:
+        name = field["name"]
+        args = _bind(field["args"], variables)
+        if name == "_meta":
+            return self._render({"block": {"number": self.block_number}}, field["children"], fragments)
+        if name in SINGULAR:
+            entity = self.by_id[SINGULAR[name]].get(str(args.get("id", "")).lower())
+            return self._render(entity, field["children"], fragments) if entity else None
+        if name not in COLLECTIONS:
+            raise ValueError(f"Type `Query` has no field `{name}`")
+
+        collection = COLLECTIONS[name]
+        where = args.get("where") or {}
+        order_by = args.get("orderBy", "id")
+        skip = int(args.get("skip", 0) or 0)
+        first = int(args.get("first", 100) or 100)
+        if first > 1000:
+            raise ValueError("The `first` argument must be between 0 and 1000")
+
+        ordered = self._ordered(collection, where, order_by)
+        if args.get("orderDirection") == "desc":
+            ordered = reversed(ordered)
+        page = itertools.islice((e for e in ordered if _matches(e, where)), skip, skip + first)
+        return [self._render(e, field["children"], fragments) for e in page]
+
+    def _ordered(self, collection: str, where: Dict[str, Any], order_by: str) -> List[Dict[str, Any]]:
+        """Candidate entities sorted ascending by order_by, cached per sort key
+
+        Filters on an indexed field (pool, token, owner) narrow the list first,
+        and the filtered scan stops as soon as a page is full.
+        """
+        scope = next((f for f in INDEXED_FIELDS if f in where), None)
+        value = str(_ref_id(where[scope])).lower() if scope else None
+        key = (collection, scope, value, order_by)
+        with self._lock:
+            ordered = self._sorted.get(key)
+        if ordered is None:
+            candidates = self._index(collection, scope).get(value, []) if scope else self.collections[collection]
+            ordered = sorted(candidates, key=lambda e: _compare_key(order_by, e.get(order_by)))
+            with self._lock:
+                self._sorted[key] = ordered
+        return ordered
+
+    def _index(self, collection: str, field: str) -> Dict[str, List[Dict[str, Any]]]:
+        key = (collection, field)
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is None:
+                index = {}
+                for entity in self.collections[collection]:
+                    index.setdefault(str(_ref_id(entity.get(field))).lower(), []).append(entity)
+                self._indexes[key] = index
+        return index
+
+    def _render(self, entity: Any, selection, fragments) -> Any:
+        if selection is None or entity is None:
+            return entity
+        out = {}
+        for field in self._expand(selection, fragments):
+            value = entity.get(field["name"])
+            if field["children"] is not None:
+                if isinstance(value, str) and field["name"] in RELATIONS:
+                    value = self.by_id[RELATIONS[field["name"]]].get(value.lower())
+                value = self._render(value, field["children"], fragments)
+            out[field["alias"]] = value
+        return out
+
+
+# --- Synthetic data ----------------------------------------------------------
+
+def synthetic_dataset(
+    pools: int = 20,
+    swaps_per_pool: int = 2000,
+    days: int = 90,
+    positions: int = 500,
+    seed: int = 0,
+    now: Optional[int] = None,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """Generate a deterministic dataset shaped like the Uniswap v3 subgraph"""
+    rng = random.Random(seed)
+    now = now or int(time.time())
+    symbols = ["USDC", "WETH", "WBTC", "DAI", "USDT", "UNI", "LINK", "MATIC", "ARB", "OP"]
+    decimals = {"USDC": 6, "USDT": 6, "WBTC": 8}
+    tokens = []
+    for i, symbol in enumerate(symbols):
+        tokens.append({
+            "id": f"0x{i + 1:040x}", "symbol": symbol, "name": symbol, "decimals": str(decimals.get(symbol, 18)),
+            "totalSupply": str(rng.randint(10**6, 10**9)), "volume": f"{rng.uniform(1e6, 1e9):.6f}",
+            "volumeUSD": f"{rng.uniform(1e6, 1e10):.6f}", "feesUSD": f"{rng.uniform(1e4, 1e7):.6f}",
+            "txCount": str(rng.randint(10**3, 10**7)), "totalValueLocked": f"{rng.uniform(1e3, 1e8):.6f}",
+            "totalValueLockedUSD": f"{rng.uniform(1e5, 1e9):.6f}", "derivedETH": f"{rng.uniform(1e-4, 20):.18f}",
+        })
+
+    out: Dict[str, List[Dict[str, Any]]] = {
+        "tokens": tokens, "pools": [], "swaps": [], "poolDayDatas": [], "tokenDayDatas": [],
+        "positions": [], "factories": [],
+    }
+    fee_tiers = [100, 500, 3000, 10000]
+    start = now - days * DAY_SECONDS
+    for p in range(pools):
+        token0, token1 = sorted(rng.sample(tokens, 2), key=lambda t: t["id"])
+        pool_id = f"0x{0xa0000 + p:040x}"
+        tick = rng.randint(-300000, 300000)
+        sqrt_price = int(1.0001 ** (tick / 2) * 2**96)
+        price = 1.0001**tick
+        out["pools"].append({
+            "id": pool_id, "token0": token0["id"], "token1": token1["id"],
+            "feeTier": str(rng.choice(fee_tiers)), "liquidity": str(rng.randint(10**15, 10**24)),
+            "sqrtPrice": str(sqrt_price), "tick": str(tick),
+            "token0Price": f"{1 / price:.18f}", "token1Price": f"{price:.18f}",
+            "volumeUSD": f"{rng.uniform(1e6, 1e10):.6f}", "volumeToken0": f"{rng.uniform(1e3, 1e8):.6f}",
+            "volumeToken1": f"{rng.uniform(1e3, 1e8):.6f}", "feesUSD": f"{rng.uniform(1e4, 1e7):.6f}",
+            "txCount": str(rng.randint(10**3, 10**6)), "totalValueLockedToken0": f"{rng.uniform(1e3, 1e8):.6f}",
+            "totalValueLockedToken1": f"{rng.uniform(1e3, 1e8):.6f}",
+            "totalValueLockedUSD": f"{rng.uniform(1e5, 1e9):.6f}",
+        })
+
+        timestamp = start
+        for s in range(swaps_per_pool):
+            timestamp += rng.randint(0, 2 * days * DAY_SECONDS // max(swaps_per_pool, 1))
+            tick += rng.randint(-30, 30)
+            amount_usd = rng.lognormvariate(7, 2.5)
+            out["swaps"].append({
+                "id": f"0x{rng.getrandbits(256):064x}#{s % 50}", "timestamp": str(min(timestamp, now)),
+                "pool": pool_id, "sender": f"0x{rng.getrandbits(160):040x}",
+                "recipient": f"0x{rng.getrandbits(160):040x}", "origin": f"0x{rng.getrandbits(160):040x}",
+                "amount0": f"{rng.uniform(-1e5, 1e5):.18f}", "amount1": f"{rng.uniform(-1e5, 1e5):.18f}",
+                "amountUSD": f"{amount_usd:.6f}", "sqrtPriceX96": str(int(1.0001 ** (tick / 2) * 2**96)),
+                "tick": str(tick),
+                "transaction": {"id": f"0x{rng.getrandbits(256):064x}", "blockNumber": str(15_000_000 + s)},
+            })
+
+        close = price
+        for d in range(days):
+            open_ = close
+            close = open_ * rng.uniform(0.95, 1.05)
+            out["poolDayDatas"].append({
+                "id": f"{pool_id}-{start // DAY_SECONDS + d}", "pool": pool_id,
+                "date": (start // DAY_SECONDS + d) * DAY_SECONDS,
+                "volumeUSD": f"{rng.uniform(1e5, 1e8):.6f}", "tvlUSD": f"{rng.uniform(1e6, 1e9):.6f}",
+                "feesUSD": f"{rng.uniform(1e2, 1e5):.6f}", "txCount": str(rng.randint(10, 10**4)),
+                "open": f"{open_:.18f}", "high": f"{max(open_, close) * 1.01:.18f}",
+                "low": f"{min(open_, close) * 0.99:.18f}", "close": f"{close:.18f}",
+            })
+
+    for token in tokens:
+        close = rng.uniform(0.5, 3000)
+        for d in range(days):
+            open_ = close
+            close = open_ * rng.uniform(0.95, 1.05)
+            out["tokenDayDatas"].append({
+                "id": f"{token['id']}-{start // DAY_SECONDS + d}", "token": token["id"],
+                "date": (start // DAY_SECONDS + d) * DAY_SECONDS, "priceUSD": f"{close:.18f}",
+                "volumeUSD": f"{rng.uniform(1e5, 1e8):.6f}", "totalValueLockedUSD": f"{rng.uniform(1e6, 1e9):.6f}",
+                "open": f"{open_:.18f}", "high": f"{max(open_, close) * 1.01:.18f}",
+                "low": f"{min(open_, close) * 0.99:.18f}", "close": f"{close:.18f}",
+            })
+
+    owners = [f"0x{rng.getrandbits(160):040x}" for _ in range(max(positions // 5, 1))]
+    for i in range(positions):
+        pool = rng.choice(out["pools"])
+        lower = int(pool["tick"]) - rng.randint(10, 5000)
+        out["positions"].append({
+            "id": str(i + 1), "owner": rng.choice(owners), "pool": pool["id"],
+            "liquidity": str(rng.choice([0, rng.randint(10**10, 10**20)])),
+            "tickLower": {"tickIdx": str(lower)}, "tickUpper": {"tickIdx": str(lower + rng.randint(10, 10000))},
+            "depositedToken0": f"{rng.uniform(0, 1e5):.6f}", "depositedToken1": f"{rng.uniform(0, 1e5):.6f}",
+            "withdrawnToken0": "0", "withdrawnToken1": "0",
+            "collectedFeesToken0": f"{rng.uniform(0, 1e3):.6f}", "collectedFeesToken1": f"{rng.uniform(0, 1e3):.6f}",
+        })
+
+    out["factories"].append({
+        "id": FACTORY_ADDRESS, "poolCount": str(len(out["pools"])), "txCount": str(len(out["swaps"])),
+        "totalVolumeUSD": f"{sum(float(s['amountUSD']) for s in out['swaps']):.6f}",
+        "totalFeesUSD": f"{sum(float(p['feesUSD']) for p in out['pools']):.6f}",
+        "totalValueLockedUSD": f"{sum(float(p['totalValueLockedUSD']) for p in out['pools']):.6f}",
+    })
+    return out
+
+
+def load_dataset(path: str) -> Dict[str, List[Dict[str, Any]]]:
+    """Load a recorded dataset: a JSON object of collection name -> entity list"""
+    with open(path) as f:
+        return json.load(f)
+
+
+# --- HTTP server -------------------------------------------------------------
+
+# How the server rejects hash-only persisted query requests
+APQ_MODES = ("apollo", "graph-node")
+
+
+class MockSubgraphServer:
+    """Serve a MockSubgraph over HTTP on a background thread
+
+    latency (+ uniform jitter) is added to every response. error_rate is the
+    fraction of requests answered with error_status (503 by default) or, if
+    error_status is None, with a GraphQL errors payload.
+
+    Hash-only (persisted query) bodies are rejected the way the server named
+    by apq_mode would: "apollo" answers PersistedQueryNotSupported, while
+    "graph-node" answers HTTP 400 because the query field is missing.
+    """
+
+    def __init__(
+        self,
+        dataset: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: Optional[int] = 503,
+        seed: int = 0,
+        apq_mode: str = "apollo",
+    ):
+        if apq_mode not in APQ_MODES:
+            raise ValueError(f"Unknown apq_mode {apq_mode!r} (available: {', '.join(APQ_MODES)})")
+        self.subgraph = MockSubgraph(dataset if dataset is not None else synthetic_dataset(seed=seed))
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.apq_mode = apq_mode
+        self.requests = 0
+        self._rng = random.Random(seed)
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self) -> "MockSubgraphServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "MockSubgraphServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                mock.requests += 1
+                delay = mock.latency + (mock._rng.uniform(0, mock.jitter) if mock.jitter else 0.0)
+                if delay:
+                    time.sleep(delay)
+
+                status = 200
+                if mock.error_rate and mock._rng.random() < mock.error_rate:
+                    if mock.error_status is None:
+                        payload = {"errors": [{"message": "Injected indexing error"}]}
+                    else:
+                        status, payload = mock.error_status, {"error": "injected"}
+                elif "query" not in body and mock.apq_mode == "graph-node":
+                    status = 400
+                    payload = {"errors": [{"message": 'The "query" field is missing in request data'}]}
+                elif "query" not in body:
+                    payload = {"errors": [{"message": "PersistedQueryNotSupported"}]}
+                else:
+                    payload = mock.subgraph.execute(body["query"], body.get("variables"))
+
+                out = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(out)))
+                self.end_headers()
+                self.wfile.write(out)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a mock Uniswap v3 subgraph")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--dataset", help="recorded dataset JSON (default: synthetic)")
+    parser.add_argument("--pools", type=int, default=20)
+    parser.add_argument("--swaps-per-pool", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra uniform random latency")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--apq-mode", choices=APQ_MODES, default="apollo",
+                        help="how hash-only persisted queries are rejected")
+    args = parser.parse_args()
+
+    dataset = (load_dataset(args.dataset) if args.dataset
+               else synthetic_dataset(pools=args.pools, swaps_per_pool=args.swaps_per_pool))
+    server = MockSubgraphServer(
+        dataset, args.host, args.port, args.latency, args.jitter, args.error_rate,
+        apq_mode=args.apq_mode,
+    )
+    print(f"Mock subgraph listening on {server.url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
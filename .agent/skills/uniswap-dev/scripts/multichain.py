@@ -0,0 +1,126 @@
+"""
+Multi-Chain Subgraph Scanner
+
+Runs the same UniswapSubgraph query against every configured chain
+endpoint concurrently and merges the answers into one snapshot. Each
+merged record is tagged with its chain, and the scan reports per-chain
+latency and errors, so one slow or failing chain does not hide the others.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from subgraph_query import CHAIN_ENDPOINTS, UniswapSubgraph
+
+
+class MultiChainScanner:
+    """Fan one query out to several subgraph endpoints in parallel"""
+
+    def __init__(
+        self,
+        endpoints: Optional[Dict[str, str]] = None,
+        max_workers: Optional[int] = None,
+        **client_options: Any,
+    ):
+        endpoints = endpoints or CHAIN_ENDPOINTS
+        self.clients = {
+            chain: UniswapSubgraph(url, **client_options) for chain, url in endpoints.items()
+        }
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or len(self.clients))
+
+    def close(self) -> None:
+        """Stop the worker threads and close every client"""
+        self._executor.shutdown(wait=True)
+        for client in self.clients.values():
+            client.close()
+
+    def __enter__(self) -> "MultiChainScanner":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def scan(self, call: Callable[[str, UniswapSubgraph], Any]) -> Dict[str, Any]:
+        """Run call(chain, client) on every chain at once and merge the results
+
+        Returns {"results": [...], "latency": {chain: seconds},
+        "errors": {chain: message}}. List results are flattened. Every record
+        is copied with a "chain" key; None results are skipped.
+        """
+        started = time.perf_counter()
+        futures = {
+            chain: self._executor.submit(_timed, call, chain, client)
+            for chain, client in self.clients.items()
+        }
+
+        results: List[Dict[str, Any]] = []
+        latency: Dict[str, float] = {}
+        errors: Dict[str, str] = {}
+        for chain, future in futures.items():
+            value, elapsed, error = future.result()
+            latency[chain] = elapsed
+            if error is not None:
+                errors[chain] = error
+                continue
+            records = value if isinstance(value, list) else [value]
+            results.extend({**record, "chain": chain} for record in records if record is not None)
+
+        return {
+            "results": results,
+            "latency": latency,
+            "errors": errors,
+            "elapsed": time.perf_counter() - started,
+        }
+
+    def get_top_pools(self, limit: int = 10) -> Dict[str, Any]:
+        """Top pools by volume on every chain"""
+        return self.scan(lambda chain, client: client.get_top_pools(limit))
+
+    def get_pool(self, pool_addresses: Union[str, Dict[str, str]]) -> Dict[str, Any]:
+        """Pool by address on every chain (or a per-chain address mapping)"""
+        if isinstance(pool_addresses, str):
+            return self.scan(lambda chain, client: client.get_pool(pool_addresses))
+        return self.scan(
+            lambda chain, client: client.get_pool(pool_addresses[chain])
+            if chain in pool_addresses else None
+        )
+
+    def get_large_swaps(self, min_usd: float = 100000, limit: int = 10) -> Dict[str, Any]:
+        """Largest swaps above min_usd on every chain"""
+        return self.scan(lambda chain, client: client.get_large_swaps(min_usd, limit))
+
+
+def _timed(call: Callable[[str, UniswapSubgraph], Any], chain: str, client: UniswapSubgraph):
+    """Run one chain's call, returning (value, seconds, error message)"""
+    started = time.perf_counter()
+    try:
+        value = call(chain, client)
+        return value, time.perf_counter() - started, None
+    except Exception as e:
+        return None, time.perf_counter() - started, str(e)
+
+
+# Example usage functions
+def example_cross_chain_top_pools():
+    """Example: One snapshot of top pools across all chains"""
+    with MultiChainScanner() as scanner:
+        snapshot = scanner.get_top_pools(limit=5)
+
+    print("=== Top Pools Across Chains ===")
+    for pool in sorted(snapshot["results"], key=lambda p: float(p["volumeUSD"]), reverse=True):
+        print(f"[{pool['chain']}] {pool['token0']['symbol']}/{pool['token1']['symbol']}: "
+              f"${float(pool['volumeUSD']):,.0f}")
+
+    print("\nLatency:")
+    for chain, seconds in snapshot["latency"].items():
+        status = f"error: {snapshot['errors'][chain]}" if chain in snapshot["errors"] else "ok"
+        print(f"  {chain}: {seconds * 1000:.0f} ms ({status})")
+    print(f"Snapshot took {snapshot['elapsed'] * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    try:
+        example_cross_chain_top_pools()
+    except Exception as e:
+        print(f"Error: {e}")
@@ -0,0 +1,226 @@
+"""
+Uniswap v3 Price Math
+
+Converts sqrtPriceX96 and ticks to decimal-adjusted prices locally instead
+of relying on the subgraph's precomputed token0Price/token1Price floats.
+Single values are exact: TickMath is ported bit-for-bit in integer
+arithmetic and prices are Fractions. Whole swap pages and pool lists use a
+vectorized float64 path over columnar.BigUIntColumn, accurate to a few ulp.
+
+Prices are token1 per token0 (the subgraph's token1Price) unless
+invert=True.
+
+Requires: pip install numpy (vectorized functions only)
+"""
+
+import math
+from decimal import Decimal, localcontext
+from fractions import Fraction
+from typing import Any, Dict, Union
+
+import numpy as np
+
+from subgraph_query import UniswapSubgraph
+from columnar import BigUIntColumn, Columns
+
+Q96 = 2**96
+Q192 = 2**192
+
+# TickMath bounds
+MIN_TICK = -887272
+MAX_TICK = 887272
+MIN_SQRT_RATIO = 4295128739
+MAX_SQRT_RATIO = 1461446703485210103287273052203988822378723970342
+
+# Q128 factors sqrt(1.0001)^-(2^i) for each bit of |tick| (TickMath.getSqrtRatioAtTick)
+_TICK_FACTORS = (
+    (0x2, 0xFFF97272373D413259A46990580E213A),
+    (0x4, 0xFFF2E50F5F656932EF12357CF3C7FDCC),
+    (0x8, 0xFFE5CACA7E10E4E61C3624EAA0941CD0),
+    (0x10, 0xFFCB9843D60F6159C9DB58835C926644),
+    (0x20, 0xFF973B41FA98C081472E6896DFB254C0),
+    (0x40, 0xFF2EA16466C96A3843EC78B326B52861),
+    (0x80, 0xFE5DEE046A99A2A811C461F1969C3053),
+    (0x100, 0xFCBE86C7900A88AEDCFFC83B479AA3A4),
+    (0x200, 0xF987A7253AC413176F2B074CF7815E54),
+    (0x400, 0xF3392B0822B70005940C7A398E4B70F3),
+    (0x800, 0xE7159475A2C29B7443B29C7FA6E889D9),
+    (0x1000, 0xD097F3BDFD2022B8845AD8F792AA5825),
+    (0x2000, 0xA9F746462D870FDF8A65DC1F90E061E5),
+    (0x4000, 0x70D869A156D2A1B890BB3DF62BAF32F7),
+    (0x8000, 0x31BE135F97D08FD981231505542FCFA6),
+    (0x10000, 0x9AA508B5B7A84E1C677DE54F3E99BC9),
+    (0x20000, 0x5D6AF8DEDB81196699C329225EE604),
+    (0x40000, 0x2216E584F5FA1EA926041BEDFE98),
+    (0x80000, 0x48A170391F7DC42444E8FA2),
+)
+_UINT256_MAX = 2**256 - 1
+_LOG_SQRT_TICK = math.log(1.0001) / 2
+# Worst-case float64 error of a tick estimate, with a wide safety margin
+_TICK_ROUNDING = 1e-6
+
+
+def get_sqrt_ratio_at_tick(tick: int) -> int:
+    """sqrtPriceX96 at a tick, exactly as TickMath.getSqrtRatioAtTick computes it"""
+    if not MIN_TICK <= tick <= MAX_TICK:
+        raise ValueError(f"Tick {tick} outside [{MIN_TICK}, {MAX_TICK}]")
+    abs_tick = abs(tick)
+    ratio = 0xFFFCB933BD6FAD37AA2D162D1A594001 if abs_tick & 0x1 else 1 << 128
+    for bit, factor in _TICK_FACTORS:
+        if abs_tick & bit:
+            ratio = (ratio * factor) >> 128
+    if tick > 0:
+        ratio = _UINT256_MAX // ratio
+    # Q128.128 -> Q64.96, rounding up like the contract
+    return (ratio >> 32) + (1 if ratio & 0xFFFFFFFF else 0)
+
+
+def get_tick_at_sqrt_ratio(sqrt_price_x96: int) -> int:
+    """Greatest tick whose sqrt ratio is <= sqrt_price_x96 (TickMath.getTickAtSqrtRatio)"""
+    if not MIN_SQRT_RATIO <= sqrt_price_x96 < MAX_SQRT_RATIO:
+        raise ValueError(f"sqrtPriceX96 {sqrt_price_x96} outside [MIN_SQRT_RATIO, MAX_SQRT_RATIO)")
+    # Float estimate, then step to the exact answer
+    tick = math.floor((math.log(sqrt_price_x96) - 96 * math.log(2)) / _LOG_SQRT_TICK)
+    return _exact_tick(min(max(tick, MIN_TICK), MAX_TICK), sqrt_price_x96)
+
+
+def _exact_tick(tick: int, sqrt_price_x96: int) -> int:
+    """Step a tick estimate to the greatest tick whose sqrt ratio is <= sqrt_price_x96"""
+    while tick > MIN_TICK and get_sqrt_ratio_at_tick(tick) > sqrt_price_x96:
+        tick -= 1
+    while tick < MAX_TICK and get_sqrt_ratio_at_tick(tick + 1) <= sqrt_price_x96:
+        tick += 1
+    return tick
+
+
+def sqrt_price_x96_to_price(
+    sqrt_price_x96: Union[int, str],
+    decimals0: int = 0,
+    decimals1: int = 0,
+    invert: bool = False,
+) -> Fraction:
+    """Exact decimal-adjusted price from a sqrtPriceX96 value"""
+    sqrt_price = int(sqrt_price_x96)
+    price = Fraction(sqrt_price * sqrt_price, Q192) * Fraction(10) ** (int(decimals0) - int(decimals1))
+    return 1 / price if invert else price
+
+
+def tick_to_price(tick: int, decimals0: int = 0, decimals1: int = 0, invert: bool = False) -> Fraction:
+    """Exact price at a tick's on-chain sqrt ratio (1.0001**tick up to Q64.96 rounding)"""
+    return sqrt_price_x96_to_price(get_sqrt_ratio_at_tick(int(tick)), decimals0, decimals1, invert)
+
+
+def price_to_sqrt_price_x96(
+    price: Union[Fraction, Decimal, str, int],
+    decimals0: int = 0,
+    decimals1: int = 0,
+) -> int:
+    """Floor sqrtPriceX96 for a decimal-adjusted price (token1 per token0)"""
+    raw = Fraction(price) * Fraction(10) ** (int(decimals1) - int(decimals0))
+    if raw <= 0:
+        raise ValueError(f"Price must be positive, got {price}")
+    return math.isqrt(raw.numerator * Q192 // raw.denominator)
+
+
+def price_to_tick(price: Union[Fraction, Decimal, str, int], decimals0: int = 0, decimals1: int = 0) -> int:
+    """Tick containing a decimal-adjusted price"""
+    return get_tick_at_sqrt_ratio(price_to_sqrt_price_x96(price, decimals0, decimals1))
+
+
+def to_decimal(price: Fraction, precision: int = 40) -> Decimal:
+    """Round a Fraction price to a Decimal with precision significant digits"""
+    with localcontext() as context:
+        context.prec = precision
+        return Decimal(price.numerator) / Decimal(price.denominator)
+
+
+def pool_price(pool: Dict[str, Any], invert: bool = False) -> Fraction:
+    """Exact price of a get_pool record from its sqrtPrice and token decimals"""
+    return sqrt_price_x96_to_price(
+        pool["sqrtPrice"], pool["token0"]["decimals"], pool["token1"]["decimals"], invert
+    )
+
+
+# --- Vectorized path ---------------------------------------------------------
+
+def prices_from_sqrt(
+    sqrt_prices: BigUIntColumn,
+    decimals0: Union[int, np.ndarray] = 0,
+    decimals1: Union[int, np.ndarray] = 0,
+    invert: bool = False,
+) -> np.ndarray:
+    """float64 prices for a column of sqrtPriceX96 values
+
+    Dividing by 2**96 is exact in floating point, so the only rounding is in
+    the limb conversion and the square (a few ulp). decimals may be scalars
+    or per-row arrays.
+    """
+    ratio = sqrt_prices.to_float() / float(Q96)
+    return _adjust(ratio * ratio, decimals0, decimals1, invert)
+
+
+def prices_from_ticks(
+    ticks: np.ndarray,
+    decimals0: Union[int, np.ndarray] = 0,
+    decimals1: Union[int, np.ndarray] = 0,
+    invert: bool = False,
+) -> np.ndarray:
+    """float64 prices 1.0001**tick for an array of ticks"""
+    return _adjust(np.power(1.0001, np.asarray(ticks, dtype=np.float64)), decimals0, decimals1, invert)
+
+
+def ticks_from_sqrt(sqrt_prices: BigUIntColumn) -> np.ndarray:
+    """Tick of each sqrtPriceX96, exactly as get_tick_at_sqrt_ratio computes it"""
+    with np.errstate(divide="ignore"):
+        log_ratio = np.log(sqrt_prices.to_float()) - 96 * math.log(2)
+    estimates = log_ratio / _LOG_SQRT_TICK
+    ticks = np.clip(np.floor(estimates), MIN_TICK, MAX_TICK).astype(np.int32)
+    # Float rounding can only put the floor on the wrong side of a tick
+    # boundary when the estimate lies next to one; settle those rows with
+    # the integer comparison TickMath uses
+    distance = np.abs(estimates - np.round(estimates))
+    for i in np.flatnonzero(~(distance > _TICK_ROUNDING)):
+        ticks[i] = _exact_tick(int(ticks[i]), sqrt_prices[int(i)])
+    return ticks
+
+
+def swap_prices(swaps: Columns, decimals0: int, decimals1: int, invert: bool = False) -> np.ndarray:
+    """Post-swap prices for decoded swaps (columnar.decode_swaps)"""
+    return prices_from_sqrt(swaps["sqrtPriceX96"], decimals0, decimals1, invert)
+
+
+def pool_prices(pools: Columns, invert: bool = False) -> np.ndarray:
+    """Current prices for decoded pools (columnar.decode_pools), each with its own decimals"""
+    return prices_from_sqrt(pools["sqrtPrice"], pools["token0Decimals"], pools["token1Decimals"], invert)
+
+
+def _adjust(raw: np.ndarray, decimals0, decimals1, invert: bool) -> np.ndarray:
+    shift = np.asarray(decimals0, dtype=np.float64) - np.asarray(decimals1, dtype=np.float64)
+    price = raw * np.power(10.0, shift)
+    if invert:
+        with np.errstate(divide="ignore"):
+            return 1.0 / price
+    return price
+
+
+# Example usage functions
+def example_exact_pool_price():
+    """Example: Compare the subgraph's float price with the exact one"""
+    with UniswapSubgraph() as subgraph:
+        pool = subgraph.get_pool("0x88e6a0c2ddd26feeb64f039a2c41296fcb3f5640")
+
+    symbol0, symbol1 = pool["token0"]["symbol"], pool["token1"]["symbol"]
+    price = pool_price(pool, invert=True)
+
+    print("=== Exact Pool Price ===")
+    print(f"sqrtPriceX96: {pool['sqrtPrice']} (tick {pool['tick']})")
+    print(f"Exact:    1 {symbol1} = {to_decimal(price, 30)} {symbol0}")
+    print(f"Subgraph: 1 {symbol1} = {pool['token0Price']} {symbol0}")
+    print(f"Tick from sqrtPrice: {get_tick_at_sqrt_ratio(int(pool['sqrtPrice']))}")
+
+
+if __name__ == "__main__":
+    try:
+        example_exact_pool_price()
+    except Exception as e:
+        print(f"Error: {e}")
@@ -0,0 +1,304 @@
+"""
+Local Swap Quote Simulator
+
+Simulates exact-input and exact-output swaps against a pool snapshot
+(get_pool's sqrtPrice, liquidity, tick and feeTier) without calling the
+on-chain quoter. Liquidity is constant only up to the next initialized
+tick, so a quote is simulated within one range: by default the
+tick-spacing interval around the current tick (initialized ticks always
+sit on spacing multiples), or explicit tick_lower/tick_upper when the
+nearest initialized ticks are known. Trades that would leave the range are
+filled up to its edge and flagged with exceeds_range.
+
+quote_exact_input/quote_exact_output port SqrtPriceMath and
+SwapMath.computeSwapStep in integer math and match the contracts to the
+wei. quote_grid evaluates a whole array of trade sizes at once in float64.
+
+Amounts are raw token units (wei); use to_raw/from_raw for decimals.
+
+Requires: pip install numpy (quote_grid only)
+"""
+
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from subgraph_query import UniswapSubgraph
+from price_math import Q96, get_sqrt_ratio_at_tick, get_tick_at_sqrt_ratio
+
+# Fee tier (hundredths of a bip) -> tick spacing, as enabled by the v3 factory
+TICK_SPACINGS = {100: 1, 500: 10, 3000: 60, 10000: 200}
+
+FEE_DENOMINATOR = 1_000_000
+_UINT256 = 2**256
+
+
+class PoolState:
+    """The pool fields a single-range quote needs"""
+
+    def __init__(
+        self,
+        sqrt_price_x96: int,
+        liquidity: int,
+        tick: int,
+        fee: int,
+        tick_lower: Optional[int] = None,
+        tick_upper: Optional[int] = None,
+        decimals0: int = 0,
+        decimals1: int = 0,
+    ):
+        self.sqrt_price_x96 = int(sqrt_price_x96)
+        self.liquidity = int(liquidity)
+        self.tick = int(tick)
+        self.fee = int(fee)
+        spacing = TICK_SPACINGS.get(self.fee, 1)
+        lower = self.tick // spacing * spacing
+        self.tick_lower = lower if tick_lower is None else int(tick_lower)
+        self.tick_upper = lower + spacing if tick_upper is None else int(tick_upper)
+        self.decimals0 = int(decimals0)
+        self.decimals1 = int(decimals1)
+        self.sqrt_lower = get_sqrt_ratio_at_tick(self.tick_lower)
+        self.sqrt_upper = get_sqrt_ratio_at_tick(self.tick_upper)
+
+    @classmethod
+    def from_pool(
+        cls, pool: Dict[str, Any], tick_lower: Optional[int] = None, tick_upper: Optional[int] = None
+    ) -> "PoolState":
+        """Build from a get_pool record"""
+        return cls(
+            pool["sqrtPrice"], pool["liquidity"], pool["tick"], pool["feeTier"], tick_lower, tick_upper,
+            pool["token0"]["decimals"], pool["token1"]["decimals"],
+        )
+
+    def to_raw(self, amount: float, token: int) -> int:
+        """Human amount of token 0 or 1 -> raw units"""
+        return int(amount * 10 ** (self.decimals0 if token == 0 else self.decimals1))
+
+    def from_raw(self, amount: Any, token: int) -> Any:
+        """Raw units of token 0 or 1 (int or array) -> human amount"""
+        return amount / 10 ** (self.decimals0 if token == 0 else self.decimals1)
+
+
+# --- SqrtPriceMath / SwapMath (integer, contract-exact) ----------------------
+
+def _mul_div(a: int, b: int, denominator: int) -> int:
+    return a * b // denominator
+
+
+def _mul_div_rounding_up(a: int, b: int, denominator: int) -> int:
+    return -(-a * b // denominator)
+
+
+def _div_rounding_up(a: int, b: int) -> int:
+    return -(-a // b)
+
+
+def get_amount0_delta(sqrt_a: int, sqrt_b: int, liquidity: int, round_up: bool) -> int:
+    """Token0 amount between two sqrt prices (SqrtPriceMath.getAmount0Delta)"""
+    if sqrt_a > sqrt_b:
+        sqrt_a, sqrt_b = sqrt_b, sqrt_a
+    numerator1, numerator2 = liquidity << 96, sqrt_b - sqrt_a
+    if round_up:
+        return _div_rounding_up(_mul_div_rounding_up(numerator1, numerator2, sqrt_b), sqrt_a)
+    return _mul_div(numerator1, numerator2, sqrt_b) // sqrt_a
+
+
+def get_amount1_delta(sqrt_a: int, sqrt_b: int, liquidity: int, round_up: bool) -> int:
+    """Token1 amount between two sqrt prices (SqrtPriceMath.getAmount1Delta)"""
+    if sqrt_a > sqrt_b:
+        sqrt_a, sqrt_b = sqrt_b, sqrt_a
+    if round_up:
+        return _mul_div_rounding_up(liquidity, sqrt_b - sqrt_a, Q96)
+    return _mul_div(liquidity, sqrt_b - sqrt_a, Q96)
+
+
+def _next_sqrt_from_amount0(sqrt_price: int, liquidity: int, amount: int, add: bool) -> int:
+    if amount == 0:
+        return sqrt_price
+    numerator1 = liquidity << 96
+    product = amount * sqrt_price
+    if add:
+        denominator = numerator1 + product
+        if product < _UINT256 and denominator < _UINT256:
+            return _mul_div_rounding_up(numerator1, sqrt_price, denominator)
+        return _div_rounding_up(numerator1, numerator1 // sqrt_price + amount)
+    if product >= _UINT256 or numerator1 <= product:
+        raise ValueError("Output exceeds the pool's token0 reserves")
+    return _mul_div_rounding_up(numerator1, sqrt_price, numerator1 - product)
+
+
+def _next_sqrt_from_amount1(sqrt_price: int, liquidity: int, amount: int, add: bool) -> int:
+    if add:
+        return sqrt_price + (amount << 96) // liquidity
+    quotient = _div_rounding_up(amount << 96, liquidity)
+    if sqrt_price <= quotient:
+        raise ValueError("Output exceeds the pool's token1 reserves")
+    return sqrt_price - quotient
+
+
+def compute_swap_step(
+    sqrt_current: int, sqrt_target: int, liquidity: int, amount_remaining: int, fee_pips: int
+) -> Tuple[int, int, int, int]:
+    """One swap step toward sqrt_target (SwapMath.computeSwapStep)
+
+    amount_remaining > 0 is exact input, < 0 exact output. Returns
+    (sqrt_next, amount_in, amount_out, fee_amount).
+    """
+    zero_for_one = sqrt_current >= sqrt_target
+    exact_in = amount_remaining >= 0
+
+    if exact_in:
+        remaining_less_fee = _mul_div(amount_remaining, FEE_DENOMINATOR - fee_pips, FEE_DENOMINATOR)
+        amount_in = (get_amount0_delta(sqrt_target, sqrt_current, liquidity, True) if zero_for_one
+                     else get_amount1_delta(sqrt_current, sqrt_target, liquidity, True))
+        if remaining_less_fee >= amount_in:
+            sqrt_next = sqrt_target
+        elif zero_for_one:
+            sqrt_next = _next_sqrt_from_amount0(sqrt_current, liquidity, remaining_less_fee, True)
+        else:
+            sqrt_next = _next_sqrt_from_amount1(sqrt_current, liquidity, remaining_less_fee, True)
+    else:
+        amount_out = (get_amount1_delta(sqrt_target, sqrt_current, liquidity, False) if zero_for_one
+                      else get_amount0_delta(sqrt_current, sqrt_target, liquidity, False))
+        if -amount_remaining >= amount_out:
+            sqrt_next = sqrt_target
+        elif zero_for_one:
+            sqrt_next = _next_sqrt_from_amount1(sqrt_current, liquidity, -amount_remaining, False)
+        else:
+            sqrt_next = _next_sqrt_from_amount0(sqrt_current, liquidity, -amount_remaining, False)
+
+    reached = sqrt_next == sqrt_target
+    if zero_for_one:
+        if not (reached and exact_in):
+            amount_in = get_amount0_delta(sqrt_next, sqrt_current, liquidity, True)
+        if not (reached and not exact_in):
+            amount_out = get_amount1_delta(sqrt_next, sqrt_current, liquidity, False)
+    else:
+        if not (reached and exact_in):
+            amount_in = get_amount1_delta(sqrt_current, sqrt_next, liquidity, True)
+        if not (reached and not exact_in):
+            amount_out = get_amount0_delta(sqrt_current, sqrt_next, liquidity, False)
+
+    if not exact_in and amount_out > -amount_remaining:
+        amount_out = -amount_remaining
+    if exact_in and sqrt_next != sqrt_target:
+        fee_amount = amount_remaining - amount_in
+    else:
+        fee_amount = _mul_div_rounding_up(amount_in, fee_pips, FEE_DENOMINATOR - fee_pips)
+    return sqrt_next, amount_in, amount_out, fee_amount
+
+
+# --- Quotes ------------------------------------------------------------------
+
+def quote_exact_input(state: PoolState, amount_in: int, zero_for_one: bool) -> Dict[str, Any]:
+    """Contract-exact quote for selling amount_in (token0 if zero_for_one, else token1)"""
+    return _quote(state, int(amount_in), zero_for_one)
+
+
+def quote_exact_output(state: PoolState, amount_out: int, zero_for_one: bool) -> Dict[str, Any]:
+    """Contract-exact quote for buying amount_out (token1 if zero_for_one, else token0)"""
+    return _quote(state, -int(amount_out), zero_for_one)
+
+
+def _quote(state: PoolState, amount_specified: int, zero_for_one: bool) -> Dict[str, Any]:
+    target = state.sqrt_lower if zero_for_one else state.sqrt_upper
+    sqrt_next, amount_in, amount_out, fee = compute_swap_step(
+        state.sqrt_price_x96, target, state.liquidity, amount_specified, state.fee
+    )
+    if amount_specified >= 0:
+        filled = amount_in + fee >= amount_specified
+    else:
+        filled = amount_out >= -amount_specified
+    before = state.sqrt_price_x96 ** 2
+    return {
+        "amount_in": amount_in + fee,
+        "amount_out": amount_out,
+        "fee": fee,
+        "sqrt_price_x96_after": sqrt_next,
+        "tick_after": get_tick_at_sqrt_ratio(sqrt_next),
+        "price_impact": abs(sqrt_next ** 2 - before) / before,
+        "exceeds_range": not filled,
+    }
+
+
+def quote_grid(
+    state: PoolState,
+    amounts: np.ndarray,
+    zero_for_one: bool,
+    exact_input: bool = True,
+) -> Dict[str, np.ndarray]:
+    """Vectorized float64 quotes for an array of raw trade sizes
+
+    Returns arrays amount_in (fee included), amount_out, sqrt_price_after
+    (as a plain ratio, not X96), price_impact and exceeds_range. Sizes that
+    would leave the range are capped at its edge.
+    """
+    amounts = np.asarray(amounts, dtype=np.float64)
+    liquidity = float(state.liquidity)
+    s = state.sqrt_price_x96 / Q96
+    bound = (state.sqrt_lower if zero_for_one else state.sqrt_upper) / Q96
+    fee = state.fee / FEE_DENOMINATOR
+
+    # Work with the sqrt price move |s_next - s|, which has a closed form in
+    # every case and avoids cancellation for small trades
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        if exact_input:
+            net = amounts * (1 - fee)
+            delta = net * s * s / (liquidity + net * s) if zero_for_one else net / liquidity
+        elif zero_for_one:
+            delta = amounts / liquidity
+        else:
+            room = liquidity - amounts * s
+            delta = np.where(room > 0, amounts * s * s / room, np.inf)
+
+        exceeds = delta > abs(s - bound)
+        delta = np.minimum(delta, abs(s - bound))
+        s_next = s - delta if zero_for_one else s + delta
+
+        amount0 = liquidity * delta / (s * s_next)
+        amount1 = liquidity * delta
+        net_in, amount_out = (amount0, amount1) if zero_for_one else (amount1, amount0)
+        amount_in = net_in / (1 - fee)
+
+    if exact_input:
+        amount_in = np.where(exceeds, amount_in, amounts)
+    else:
+        amount_out = np.where(exceeds, amount_out, amounts)
+    ratio = delta / s
+    return {
+        "amount_in": amount_in,
+        "amount_out": amount_out,
+        "sqrt_price_after": s_next,
+        "price_impact": ratio * (2 - ratio) if zero_for_one else ratio * (2 + ratio),
+        "exceeds_range": exceeds,
+    }
+
+
+# Example usage functions
+def example_size_trade():
+    """Example: Price impact of selling 0.1-1000 WETH into the USDC/WETH 0.05% pool"""
+    with UniswapSubgraph() as subgraph:
+        pool = subgraph.get_pool("0x88e6a0c2ddd26feeb64f039a2c41296fcb3f5640")
+    state = PoolState.from_pool(pool)
+
+    # token0 is USDC, token1 is WETH: selling WETH is oneForZero
+    sizes = np.geomspace(0.1, 1000, 9)
+    grid = quote_grid(state, sizes * 10**state.decimals1, zero_for_one=False)
+
+    print("=== WETH -> USDC (current range only) ===")
+    for size, out, impact, exceeds in zip(
+        sizes, grid["amount_out"], grid["price_impact"], grid["exceeds_range"]
+    ):
+        note = "  (exceeds range)" if exceeds else ""
+        print(f"{size:10.2f} WETH -> {state.from_raw(out, 0):14,.2f} USDC  impact {impact:.4%}{note}")
+
+    exact = quote_exact_input(state, state.to_raw(1, 1), zero_for_one=False)
+    print(f"\nExact 1 WETH -> {state.from_raw(exact['amount_out'], 0):,.6f} USDC "
+          f"(fee {state.from_raw(exact['fee'], 1):.6f} WETH)")
+
+
+if __name__ == "__main__":
+    try:
+        example_size_trade()
+    except Exception as e:
+        print(f"Error: {e}")
@@ -0,0 +1,210 @@
+"""
+Incremental Cross-Pool Spread Detector
+
+Keeps the latest price of every pool it is fed (from get_pool,
+get_top_pools or a MultiChainScanner scan), indexed by token pair, and
+recomputes spreads only for pairs whose pools actually changed. The cost
+of an update grows with the change set, not with the number of tracked
+pools. Pairs are matched by token symbol, so the same pair on different
+chains and fee tiers is compared directly; spreads are reported gross and
+net of both pools' swap fees.
+
+Requires: pip install numpy (imported by price_math)
+"""
+
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from multichain import MultiChainScanner
+from price_math import sqrt_price_x96_to_price
+
+# Wrapped/bridged symbols that trade as the same asset across chains
+SYMBOL_ALIASES = {
+    "WETH": "ETH",
+    "USDC.E": "USDC",
+    "USDBC": "USDC",
+    "WMATIC": "MATIC",
+    "WPOL": "POL",
+}
+
+# Pool fields the detector reads; request these with get_top_pools(fields=...)
+SPREAD_FIELDS = (
+    "id", "token0.symbol", "token0.decimals", "token1.symbol", "token1.decimals",
+    "feeTier", "sqrtPrice", "token1Price", "totalValueLockedUSD",
+)
+
+DEFAULT_THRESHOLD_BPS = 30.0
+
+PairKey = Tuple[str, str]
+PoolKey = Tuple[str, str]
+
+
+def symbol_pair(pool: Dict[str, Any]) -> PairKey:
+    """Chain-independent pair key: the two aliased symbols, sorted"""
+    symbols = [_symbol(pool["token0"]["symbol"]), _symbol(pool["token1"]["symbol"])]
+    return tuple(sorted(symbols))
+
+
+def _symbol(symbol: str) -> str:
+    symbol = symbol.upper()
+    return SYMBOL_ALIASES.get(symbol, symbol)
+
+
+def pool_mid_price(pool: Dict[str, Any]) -> float:
+    """Price of token0 in token1, from sqrtPrice when decimals are known"""
+    token0, token1 = pool["token0"], pool["token1"]
+    if pool.get("sqrtPrice") and "decimals" in token0 and "decimals" in token1:
+        return float(sqrt_price_x96_to_price(pool["sqrtPrice"], token0["decimals"], token1["decimals"]))
+    return float(pool["token1Price"])
+
+
+class SpreadEngine:
+    """Pair-indexed pool prices with dirty-pair spread recomputation
+
+    update() stores each pool's price oriented to its pair (base = first
+    symbol of the pair key, price in quote per base), marks the pairs of
+    pools whose price, TVL or fee changed, then rescans only those pairs.
+    Opportunities whose net spread is at least threshold_bps are returned
+    and passed to on_opportunity.
+    """
+
+    def __init__(
+        self,
+        threshold_bps: float = DEFAULT_THRESHOLD_BPS,
+        min_tvl_usd: float = 0.0,
+        pair_key: Callable[[Dict[str, Any]], PairKey] = symbol_pair,
+        on_opportunity: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ):
+        self.threshold_bps = threshold_bps
+        self.min_tvl_usd = min_tvl_usd
+        self.pair_key = pair_key
+        self.on_opportunity = on_opportunity
+        self.quotes: Dict[PoolKey, Dict[str, Any]] = {}
+        self.pairs: Dict[PairKey, Set[PoolKey]] = {}
+        self.stats = {"updates": 0, "changed": 0, "pairs_recomputed": 0, "opportunities": 0}
+
+    def update(self, pools: Iterable[Dict[str, Any]], chain: str = "default") -> List[Dict[str, Any]]:
+        """Ingest pool snapshots and return opportunities among the changed pairs
+
+        Each pool's chain comes from its "chain" key (as tagged by
+        MultiChainScanner) or the chain argument.
+        """
+        dirty: Set[PairKey] = set()
+        for pool in pools:
+            if pool is None:
+                continue
+            self.stats["updates"] += 1
+            key = (pool.get("chain", chain), pool["id"].lower())
+            quote = self._quote(key, pool)
+            previous = self.quotes.get(key)
+            if previous is not None and _same(previous, quote):
+                continue
+            if previous is not None and previous["pair"] != quote["pair"]:
+                self._unlink(key, previous["pair"])
+                dirty.add(previous["pair"])
+            self.quotes[key] = quote
+            self.pairs.setdefault(quote["pair"], set()).add(key)
+            dirty.add(quote["pair"])
+            self.stats["changed"] += 1
+        return self._recompute(dirty)
+
+    def remove(self, chain: str, pool_id: str) -> None:
+        """Stop tracking a pool"""
+        key = (chain, pool_id.lower())
+        quote = self.quotes.pop(key, None)
+        if quote is not None:
+            self._unlink(key, quote["pair"])
+
+    def spread(self, pair: PairKey) -> Optional[Dict[str, Any]]:
+        """Widest spread currently available for a pair (None with fewer than two pools)"""
+        members = [
+            self.quotes[key] for key in self.pairs.get(pair, ())
+            if self.quotes[key]["tvl_usd"] >= self.min_tvl_usd and self.quotes[key]["price"] > 0
+        ]
+        if len(members) < 2:
+            return None
+        cheapest = min(members, key=lambda q: q["price"])
+        richest = max(members, key=lambda q: q["price"])
+        gross = (richest["price"] / cheapest["price"] - 1) * 10_000
+        fees = (cheapest["fee"] + richest["fee"]) / 100  # feeTier is in hundredths of a bip
+        return {
+            "pair": pair,
+            "buy": _venue(cheapest),
+            "sell": _venue(richest),
+            "spread_bps": gross,
+            "net_spread_bps": gross - fees,
+        }
+
+    def _quote(self, key: PoolKey, pool: Dict[str, Any]) -> Dict[str, Any]:
+        pair = self.pair_key(pool)
+        price = pool_mid_price(pool)
+        if _symbol(pool["token0"]["symbol"]) != pair[0] and price > 0:
+            price = 1 / price  # orient as quote per base
+        return {
+            "chain": key[0],
+            "pool": key[1],
+            "pair": pair,
+            "price": price,
+            "fee": int(pool.get("feeTier") or 0),
+            "tvl_usd": float(pool.get("totalValueLockedUSD") or 0),
+        }
+
+    def _unlink(self, key: PoolKey, pair: PairKey) -> None:
+        members = self.pairs.get(pair)
+        if members is not None:
+            members.discard(key)
+            if not members:
+                del self.pairs[pair]
+
+    def _recompute(self, dirty: Set[PairKey]) -> List[Dict[str, Any]]:
+        opportunities = []
+        for pair in dirty:
+            self.stats["pairs_recomputed"] += 1
+            spread = self.spread(pair)
+            if spread is None or spread["net_spread_bps"] < self.threshold_bps:
+                continue
+            opportunities.append(spread)
+            self.stats["opportunities"] += 1
+            if self.on_opportunity is not None:
+                self.on_opportunity(spread)
+        return opportunities
+
+
+def _same(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    return a["price"] == b["price"] and a["tvl_usd"] == b["tvl_usd"] and a["fee"] == b["fee"]
+
+
+def _venue(quote: Dict[str, Any]) -> Dict[str, Any]:
+    return {"chain": quote["chain"], "pool": quote["pool"], "price": quote["price"], "fee": quote["fee"]}
+
+
+def scan_top_pools(scanner: MultiChainScanner, engine: SpreadEngine, limit: int = 100) -> List[Dict[str, Any]]:
+    """Feed one cross-chain top-pools snapshot into the engine"""
+    snapshot = scanner.scan(lambda chain, client: client.get_top_pools(limit, fields=SPREAD_FIELDS))
+    return engine.update(snapshot["results"])
+
+
+# Example usage functions
+def example_cross_chain_spreads():
+    """Example: Poll top pools on every chain and print new dislocations"""
+    def report(opportunity):
+        base, quote = opportunity["pair"]
+        buy, sell = opportunity["buy"], opportunity["sell"]
+        print(f"{base}/{quote}: buy {buy['chain']} {buy['pool'][:10]} @ {buy['price']:.6g}, "
+              f"sell {sell['chain']} {sell['pool'][:10]} @ {sell['price']:.6g} "
+              f"({opportunity['net_spread_bps']:.1f} bps net)")
+
+    engine = SpreadEngine(threshold_bps=30, min_tvl_usd=1_000_000, on_opportunity=report)
+    with MultiChainScanner() as scanner:
+        print("=== Cross-Chain Spreads ===")
+        for _ in range(3):
+            scan_top_pools(scanner, engine, limit=100)
+            print(f"tracked {len(engine.quotes)} pools in {len(engine.pairs)} pairs, stats {engine.stats}")
+            time.sleep(30)
+
+
+if __name__ == "__main__":
+    try:
+        example_cross_chain_spreads()
+    except Exception as e:
+        print(f"Error: {e}")
@@ -0,0 +1,255 @@
+"""
+Subgraph Export CLI
+
+Command-line exporter for paginated subgraph data. Records are streamed
+page by page (each page decoded incrementally) and written one JSON
+object per line, so an export of any size runs in bounded memory and can
+be piped straight into jq, DuckDB or a loader. --format parquet or arrow
+writes typed columnar files instead (see arrow_export.py; needs pyarrow).
+
+Examples:
+    python subgraph_cli.py export swaps --pool 0x88e6... --since 2024-01-01 > swaps.ndjson
+    python subgraph_cli.py export positions --owner 0xabc... --owner 0xdef... -o positions.ndjson.gz
+    python subgraph_cli.py export pool-day-data --pool 0x88e6... --fields ohlc --chain arbitrum
+    python subgraph_cli.py export token-day-data --token 0xc02a... --block latest
+    python subgraph_cli.py export swaps --pool 0x88e6... --format parquet --partition-by day -o swaps/
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+from datetime import datetime, timezone
+from typing import IO, Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from subgraph_query import (
+    CHAIN_ENDPOINTS,
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_POOL_SIZE,
+    FIELD_PRESETS,
+    MAX_PAGE_SIZE,
+    FieldSet,
+    UniswapSubgraph,
+)
+
+
+def parse_timestamp(value: str) -> int:
+    """Unix seconds from an integer or an ISO 8601 date/time (UTC unless offset given)"""
+    if value.isdigit():
+        return int(value)
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def parse_fields(values: Optional[List[str]], entity: str) -> FieldSet:
+    """--fields as a FIELD_PRESETS name or dotted paths (space or comma separated)"""
+    if not values:
+        return None
+    if len(values) == 1 and values[0] in FIELD_PRESETS.get(entity, {}):
+        return values[0]
+    return [field for value in values for field in value.split(",") if field]
+
+
+def read_owners(owners: Optional[List[str]], owners_file: Optional[str]) -> List[str]:
+    """Owner addresses from --owner flags and a one-per-line file ("-" for stdin)"""
+    addresses = list(owners or [])
+    if owners_file:
+        handle = sys.stdin if owners_file == "-" else open(owners_file)
+        with handle:
+            addresses.extend(line.strip() for line in handle if line.strip())
+    if not addresses:
+        raise ValueError("positions export needs --owner or --owners-file")
+    return addresses
+
+
+# --- Exports -----------------------------------------------------------------
+
+def export_swaps(client: UniswapSubgraph, args: argparse.Namespace) -> Iterator[Dict[str, Any]]:
+    """Every swap of a pool in [since, before), newest first"""
+    return client.iter_swaps(
+        args.pool, since=args.since, before=args.before, page_size=args.page_size,
+        fields=parse_fields(args.fields, "Swap"), stream=True,
+    )
+
+
+def export_pool_day_data(client: UniswapSubgraph, args: argparse.Namespace) -> Iterator[Dict[str, Any]]:
+    """Daily pool data in [since, before), newest first"""
+    return client.iter_pool_day_data(
+        args.pool, since=args.since, before=args.before, page_size=args.page_size,
+        fields=parse_fields(args.fields, "PoolDayData"), stream=True,
+    )
+
+
+def export_token_day_data(client: UniswapSubgraph, args: argparse.Namespace) -> Iterator[Dict[str, Any]]:
+    """Daily token data in [since, before), newest first"""
+    return client.iter_token_price_history(
+        args.token, since=args.since, before=args.before, page_size=args.page_size,
+        fields=parse_fields(args.fields, "TokenDayData"), stream=True,
+    )
+
+
+def export_positions(client: UniswapSubgraph, args: argparse.Namespace) -> Iterator[Dict[str, Any]]:
+    """Positions of every owner, fetched a bounded chunk of owners at a time"""
+    owners = read_owners(args.owner, args.owners_file)
+    fields = parse_fields(args.fields, "Position")
+    chunk = DEFAULT_BATCH_SIZE * args.workers
+    for start in range(0, len(owners), chunk):
+        by_owner = client.get_positions_for_owners(
+            owners[start:start + chunk], active_only=not args.all, page_size=args.page_size,
+            max_workers=args.workers, fields=fields,
+        )
+        for positions in by_owner.values():
+            yield from positions
+
+
+EXPORTS: Dict[str, Callable[[UniswapSubgraph, argparse.Namespace], Iterable[Dict[str, Any]]]] = {
+    "swaps": export_swaps,
+    "positions": export_positions,
+    "pool-day-data": export_pool_day_data,
+    "token-day-data": export_token_day_data,
+}
+
+
+# --- Output ------------------------------------------------------------------
+
+def open_output(path: Optional[str]) -> IO[str]:
+    """Text stream for path: stdout for None or "-", gzip for *.gz"""
+    if path is None or path == "-":
+        return sys.stdout
+    if path.endswith(".gz"):
+        return gzip.open(path, "wt", encoding="utf-8")
+    return open(path, "w", encoding="utf-8")
+
+
+def write_ndjson(records: Iterable[Dict[str, Any]], out: IO[str]) -> int:
+    """Write records one compact JSON object per line and return the count"""
+    count = 0
+    for record in records:
+        out.write(json.dumps(record, separators=(",", ":")))
+        out.write("\n")
+        count += 1
+    return count
+
+
+def write_columnar(records: Iterable[Dict[str, Any]], args: argparse.Namespace) -> int:
+    """Write records to Parquet/Arrow through arrow_export and return the count"""
+    import arrow_export  # needs pyarrow; NDJSON exports work without it
+
+    constants = {}
+    for name in ("pool", "token"):
+        if getattr(args, name, None):
+            constants[name] = getattr(args, name).lower()
+    return arrow_export.export_records(
+        records,
+        arrow_export.ENTITY_SCHEMAS[args.entity],
+        args.output,
+        constants,
+        format=args.format,
+        partition_by=args.partition_by or (),
+        row_group_size=args.row_group_size,
+    )
+
+
+def run_export(args: argparse.Namespace) -> int:
+    """Run one export subcommand and return the number of records written"""
+    columnar = args.format != "ndjson"
+    if columnar:
+        if args.output in (None, "-"):
+            raise ValueError(f"--format {args.format} needs -o PATH")
+        if args.fields:
+            raise ValueError("--fields only applies to --format ndjson")
+        from arrow_export import ENTITY_SCHEMAS, schema_fields
+        args.fields = schema_fields(ENTITY_SCHEMAS[args.entity])
+    elif args.partition_by:
+        raise ValueError("--partition-by needs --format parquet or arrow")
+
+    endpoint = args.endpoint or CHAIN_ENDPOINTS[args.chain]
+    connect_timeout = args.timeout if args.connect_timeout is None else args.connect_timeout
+    with UniswapSubgraph(endpoint, timeout=(connect_timeout, args.timeout)) as client:
+        if args.block is not None:
+            # Pin the uncached client itself: a snapshot() would keep every page in its cache
+            client.block = client.get_indexed_block() if args.block == "latest" else int(args.block)
+        records = EXPORTS[args.entity](client, args)
+        if columnar:
+            count = write_columnar(records, args)
+        else:
+            out = open_output(args.output)
+            try:
+                count = write_ndjson(records, out)
+            finally:
+                if out is not sys.stdout:
+                    out.close()
+                else:
+                    out.flush()
+    if not args.quiet:
+        print(f"Exported {count} {args.entity} records", file=sys.stderr)
+    return count
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="subgraph", description="Uniswap v3 subgraph tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="stream paginated records as NDJSON")
+    entities = export.add_subparsers(dest="entity", required=True)
+
+    def entity_parser(name: str, help_text: str) -> argparse.ArgumentParser:
+        sub = entities.add_parser(name, help=help_text)
+        sub.add_argument("--chain", choices=sorted(CHAIN_ENDPOINTS), default="mainnet")
+        sub.add_argument("--endpoint", help="subgraph URL (overrides --chain)")
+        sub.add_argument("--fields", nargs="+", help="field preset name or dotted field paths")
+        sub.add_argument("--page-size", type=int, default=MAX_PAGE_SIZE)
+        sub.add_argument("--block", help="read every page at this block number, or 'latest'")
+        sub.add_argument("--timeout", type=float, default=30.0, help="read timeout in seconds")
+        sub.add_argument("--connect-timeout", type=float, help="connect timeout in seconds (default --timeout)")
+        sub.add_argument("-o", "--output", help="output file (default stdout; .gz is compressed)")
+        sub.add_argument("--format", choices=("ndjson", "parquet", "arrow"), default="ndjson")
+        sub.add_argument("--partition-by", nargs="+", metavar="COLUMN",
+                         help="parquet/arrow: write COLUMN=value directories (any column or 'day')")
+        sub.add_argument("--row-group-size", type=int, default=100_000, help="parquet/arrow rows per group")
+        sub.add_argument("-q", "--quiet", action="store_true", help="no summary on stderr")
+        return sub
+
+    def add_range(sub: argparse.ArgumentParser) -> None:
+        sub.add_argument("--since", type=parse_timestamp, help="start (unix seconds or ISO date)")
+        sub.add_argument("--before", type=parse_timestamp, help="end, exclusive")
+
+    swaps = entity_parser("swaps", "swaps of one pool")
+    swaps.add_argument("--pool", required=True)
+    add_range(swaps)
+
+    positions = entity_parser("positions", "positions of one or more owners")
+    positions.add_argument("--owner", action="append", help="owner address (repeatable)")
+    positions.add_argument("--owners-file", help="file with one owner address per line ('-' for stdin)")
+    positions.add_argument("--all", action="store_true", help="include closed (zero-liquidity) positions")
+    positions.add_argument("--workers", type=int, default=DEFAULT_POOL_SIZE)
+
+    pool_days = entity_parser("pool-day-data", "daily data of one pool")
+    pool_days.add_argument("--pool", required=True)
+    add_range(pool_days)
+
+    token_days = entity_parser("token-day-data", "daily data of one token")
+    token_days.add_argument("--token", required=True)
+    add_range(token_days)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    try:
+        run_export(args)
+    except BrokenPipeError:
+        # Downstream closed the pipe (e.g. | head): silence the final stdout flush
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        sys.exit(f"Error: {e}")
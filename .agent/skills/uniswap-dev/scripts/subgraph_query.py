@@ -6,9 +6,20 @@ It includes examples for fetching pool data, swap history, and analytics.
 """
 
 import requests
+import contextlib
+import copy
+import functools
+import hashlib
 import json
-from typing import Dict, List, Any, Optional
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, Iterator, List, Any, Optional, Set, Tuple, Union
 from datetime import datetime, timedelta
+from requests.adapters import HTTPAdapter
 
 # Subgraph endpoints
 UNISWAP_V3_MAINNET = "https://api.thegraph.com/subgraphs/name/uniswap/uniswap-v3"
@@ -16,296 +27,1813 @@ UNISWAP_V3_ARBITRUM = "https://api.thegraph.com/subgraphs/name/uniswap/uniswap-v
 UNISWAP_V3_OPTIMISM = "https://api.thegraph.com/subgraphs/name/uniswap/uniswap-v3-optimism"
 UNISWAP_V3_POLYGON = "https://api.thegraph.com/subgraphs/name/uniswap/uniswap-v3-polygon"
 
+CHAIN_ENDPOINTS = {
+    "mainnet": UNISWAP_V3_MAINNET,
+    "arbitrum": UNISWAP_V3_ARBITRUM,
+    "optimism": UNISWAP_V3_OPTIMISM,
+    "polygon": UNISWAP_V3_POLYGON,
+}
+
+_OPERATION_NAME = re.compile(r"\b(?:query|mutation|subscription)\s+(\w+)")
+
+
+def operation_name(query: str) -> str:
+    """Return the GraphQL operation name (e.g. GetPool), or anonymous if unnamed"""
+    match = _OPERATION_NAME.search(query)
+    return match.group(1) if match else "anonymous"
+
+
+# GraphQL block strings ("""...""") and ordinary "..." strings
+_STRING_LITERAL = re.compile(r'("""(?:\\"""|[^"]|"(?!""))*"""|"(?:\\.|[^"\\])*")')
+
+
+def normalize_query(query: str) -> str:
+    """Collapse whitespace outside string literals so formatting differences map to the same query"""
+    parts = _STRING_LITERAL.split(query)
+    # split() with a capturing group puts the literals at the odd indexes
+    for i in range(0, len(parts), 2):
+        parts[i] = re.sub(r"\s+", " ", parts[i])
+    return "".join(parts).strip()
+
+
+class CompiledQuery(str):
+    """Whitespace-normalized query text plus its operation name and SHA-256 hash
+
+    Behaves as the (compact) query string everywhere a str is expected.
+    """
+
+    name: str
+    sha256: str
+
+    def __new__(cls, text: str) -> "CompiledQuery":
+        compiled = super().__new__(cls, normalize_query(text))
+        compiled.name = operation_name(compiled)
+        compiled.sha256 = hashlib.sha256(compiled.encode("utf-8")).hexdigest()
+        return compiled
+
+
+# Every query compiled at import time, keyed by SHA-256 hash
+QUERY_REGISTRY: Dict[str, CompiledQuery] = {}
+
+
+def register_query(text: str) -> CompiledQuery:
+    """Compile a query once and add it to QUERY_REGISTRY"""
+    compiled = CompiledQuery(text)
+    return QUERY_REGISTRY.setdefault(compiled.sha256, compiled)
+
+
+def compile_query(query: str) -> CompiledQuery:
+    """Return query as a CompiledQuery, reusing the registered instance if any"""
+    if isinstance(query, CompiledQuery):
+        return query
+    compiled = CompiledQuery(query)
+    return QUERY_REGISTRY.get(compiled.sha256, compiled)
+
+
+# A field projection: a preset name from FIELD_PRESETS or dotted field paths
+FieldSet = Union[str, Iterable[str], None]
+
+# Named projections per entity type
+FIELD_PRESETS: Dict[str, Dict[str, Tuple[str, ...]]] = {
+    "Pool": {
+        "price_only": ("id", "sqrtPrice", "tick", "liquidity"),
+        "prices": ("id", "token0.symbol", "token1.symbol", "token0Price", "token1Price"),
+        "summary": (
+            "id", "token0.symbol", "token1.symbol", "feeTier", "volumeUSD", "totalValueLockedUSD",
+        ),
+    },
+    "Swap": {
+        "price_only": ("id", "timestamp", "sqrtPriceX96", "tick"),
+        "amounts": ("id", "timestamp", "amount0", "amount1", "amountUSD"),
+    },
+    "Token": {
+        "price_only": ("id", "symbol", "decimals", "derivedETH"),
+    },
+    "PoolDayData": {
+        "ohlc": ("date", "open", "high", "low", "close"),
+        "volume": ("date", "volumeUSD", "feesUSD", "tvlUSD"),
+    },
+    "TokenDayData": {
+        "ohlc": ("date", "open", "high", "low", "close"),
+        "price_only": ("date", "priceUSD"),
+    },
+    "Position": {
+        "liquidity_only": ("id", "owner", "liquidity", "tickLower.tickIdx", "tickUpper.tickIdx"),
+    },
+}
+
+
+def selection_set(fields: Iterable[str]) -> str:
+    """Build a GraphQL selection set from dotted paths such as token0.symbol"""
+    tree: Dict[str, Any] = {}
+    for path in fields:
+        node = tree
+        for part in path.split("."):
+            node = node.setdefault(part, {})
+    return _render_selection(tree)
+
+
+def _render_selection(tree: Dict[str, Any]) -> str:
+    return " ".join(
+        f"{name} {{ {_render_selection(children)} }}" if children else name
+        for name, children in tree.items()
+    )
+
+
+def _matching(text: str, start: int, open_char: str, close_char: str) -> int:
+    """Index of the bracket closing the one at text[start]"""
+    depth = 0
+    for index in range(start, len(text)):
+        if text[index] == open_char:
+            depth += 1
+        elif text[index] == close_char:
+            depth -= 1
+            if depth == 0:
+                return index
+    raise ValueError(f"Unbalanced {open_char}{close_char} in query: {text}")
+
+
+def root_field_span(query: str) -> Tuple[int, int, int]:
+    """Locate the operation's single root field
+
+    Returns (end of the field name, index of its selection set's "{",
+    index of the matching "}").
+    """
+    match = re.compile(r"\s*\w+").match(query, query.index("{") + 1)
+    name_end = match.end()
+    index = name_end
+    while query[index].isspace():
+        index += 1
+    if query[index] == "(":
+        index = _matching(query, index, "(", ")") + 1
+    selection_start = query.index("{", index)
+    return name_end, selection_start, _matching(query, selection_start, "{", "}")
+
+
+def _drop_unused_fragments(query: str) -> str:
+    """Remove fragment definitions that the operation no longer spreads"""
+    operation, *fragments = re.split(r"\s(?=fragment \w+ on )", query)
+    used = [f for f in fragments if f"...{f.split()[1]}" in operation]
+    return " ".join([operation, *used])
+
+
+def project(query: str, fields: FieldSet, entity: str, required: Tuple[str, ...] = ()) -> str:
+    """Replace the root field's selection with fields (or a FIELD_PRESETS name)
+
+    required fields (e.g. pagination cursors) are always selected. Returns
+    query unchanged when fields is None.
+    """
+    if fields is None:
+        return query
+    if isinstance(fields, str):
+        try:
+            fields = FIELD_PRESETS[entity][fields]
+        except KeyError:
+            presets = ", ".join(FIELD_PRESETS.get(entity, {})) or "none"
+            raise ValueError(f"Unknown {entity} field preset {fields!r} (available: {presets})")
+    return _project(compile_query(query), tuple(dict.fromkeys((*required, *fields))))
+
+
+@functools.lru_cache(maxsize=256)
+def _project(query: CompiledQuery, fields: Tuple[str, ...]) -> CompiledQuery:
+    """Build (once per query and field tuple) the projected query"""
+    _, start, end = root_field_span(query)
+    text = f"{query[:start + 1]} {selection_set(fields)} {query[end:]}"
+    return register_query(_drop_unused_fragments(text))
+
+
+_ROOT_FIELD = re.compile(r"[\s,]*(?:\w+\s*:\s*)?\w+\s*")
+
+
+@functools.lru_cache(maxsize=256)
+def pin_to_block(query: CompiledQuery) -> CompiledQuery:
+    """Add a $block variable and block: {number: $block} to every root field
+
+    Root fields that already take a block argument are left as they are.
+    """
+    start = query.index("{")
+    header = query[:start].rstrip()
+    if "$block" in header:
+        return query
+    if header.endswith(")"):
+        header = f"{header[:-1]}, $block: Int!)"
+    else:
+        header = f"{header or 'query'}($block: Int!)"
+
+    end = _matching(query, start, "{", "}")
+    pieces = [header, " {"]
+    pinned = 0
+    index = start + 1
+    while True:
+        match = _ROOT_FIELD.match(query, index)
+        if match is None or match.end() > end:
+            break
+        pieces.append(query[index:match.end()].rstrip())
+        index = match.end()
+        if query[index] == "(":
+            close = _matching(query, index, "(", ")")
+            arguments = query[index:close].rstrip()
+            if not re.search(r"\bblock\s*:", arguments):
+                arguments += ", block: {number: $block}"
+                pinned += 1
+            pieces.append(f"{arguments}) ")
+            index = close + 1
+        else:
+            pieces.append("(block: {number: $block}) ")
+            pinned += 1
+        while query[index].isspace():
+            index += 1
+        if query[index] == "{":
+            close = _matching(query, index, "{", "}")
+            pieces.append(query[index:close + 1])
+            index = close + 1
+    if not pinned:
+        return query
+    pieces.append(query[index:])
+    return register_query("".join(pieces))
+
+
+# GraphQL queries shared by the sync and async clients (compiled at import)
+POOL_FIELDS = """
+fragment PoolFields on Pool {
+    id
+    token0 {
+        id
+        symbol
+        name
+        decimals
+    }
+    token1 {
+        id
+        symbol
+        name
+        decimals
+    }
+    feeTier
+    liquidity
+    sqrtPrice
+    tick
+    token0Price
+    token1Price
+    volumeUSD
+    volumeToken0
+    volumeToken1
+    feesUSD
+    txCount
+    totalValueLockedToken0
+    totalValueLockedToken1
+    totalValueLockedUSD
+}
+"""
+
+TOKEN_FIELDS = """
+fragment TokenFields on Token {
+    id
+    symbol
+    name
+    decimals
+    totalSupply
+    volume
+    volumeUSD
+    feesUSD
+    txCount
+    totalValueLocked
+    totalValueLockedUSD
+    derivedETH
+}
+"""
+
+GET_POOL_QUERY = register_query("""
+query GetPool($id: ID!) {
+    pool(id: $id) {
+        ...PoolFields
+    }
+}
+""" + POOL_FIELDS)
+
+GET_POOLS_QUERY = register_query("""
+query GetPools($ids: [ID!]!, $first: Int!) {
+    pools(first: $first, where: { id_in: $ids }) {
+        ...PoolFields
+    }
+}
+""" + POOL_FIELDS)
+
+GET_TOP_POOLS_QUERY = register_query("""
+query GetTopPools($limit: Int!) {
+    pools(
+        first: $limit
+        orderBy: volumeUSD
+        orderDirection: desc
+    ) {
+        id
+        token0 { symbol }
+        token1 { symbol }
+        feeTier
+        volumeUSD
+        totalValueLockedUSD
+        token0Price
+        token1Price
+    }
+}
+""")
+
+SWAP_FIELDS = """
+fragment SwapFields on Swap {
+    id
+    timestamp
+    sender
+    recipient
+    amount0
+    amount1
+    amountUSD
+    sqrtPriceX96
+    tick
+    transaction {
+        id
+        blockNumber
+    }
+}
+"""
+
+TOKEN_DAY_DATA_FIELDS = """
+fragment TokenDayDataFields on TokenDayData {
+    date
+    priceUSD
+    volumeUSD
+    totalValueLockedUSD
+    open
+    high
+    low
+    close
+}
+"""
+
+POOL_DAY_DATA_FIELDS = """
+fragment PoolDayDataFields on PoolDayData {
+    date
+    volumeUSD
+    tvlUSD
+    feesUSD
+    txCount
+    open
+    high
+    low
+    close
+}
+"""
+
+POSITION_FIELDS = """
+fragment PositionFields on Position {
+    id
+    owner
+    pool {
+        id
+        token0 { symbol }
+        token1 { symbol }
+    }
+    liquidity
+    tickLower { tickIdx }
+    tickUpper { tickIdx }
+    depositedToken0
+    depositedToken1
+    withdrawnToken0
+    withdrawnToken1
+    collectedFeesToken0
+    collectedFeesToken1
+}
+"""
+
+GET_RECENT_SWAPS_QUERY = register_query("""
+query GetRecentSwaps($pool: String!, $limit: Int!) {
+    swaps(
+        first: $limit
+        orderBy: timestamp
+        orderDirection: desc
+        where: { pool: $pool }
+    ) {
+        ...SwapFields
+    }
+}
+""" + SWAP_FIELDS)
+
+GET_TOKEN_HISTORY_QUERY = register_query("""
+query GetTokenHistory($token: String!, $limit: Int!) {
+    tokenDayDatas(
+        first: $limit
+        orderBy: date
+        orderDirection: desc
+        where: { token: $token }
+    ) {
+        ...TokenDayDataFields
+    }
+}
+""" + TOKEN_DAY_DATA_FIELDS)
+
+GET_POOL_DAY_DATA_QUERY = register_query("""
+query GetPoolDayData($pool: String!, $limit: Int!) {
+    poolDayDatas(
+        first: $limit
+        orderBy: date
+        orderDirection: desc
+        where: { pool: $pool }
+    ) {
+        ...PoolDayDataFields
+    }
+}
+""" + POOL_DAY_DATA_FIELDS)
+
+GET_USER_POSITIONS_QUERY = register_query("""
+query GetUserPositions($owner: String!) {
+    positions(where: { owner: $owner }) {
+        ...PositionFields
+    }
+}
+""" + POSITION_FIELDS)
+
+GET_ACTIVE_USER_POSITIONS_QUERY = register_query("""
+query GetUserPositions($owner: String!) {
+    positions(where: { owner: $owner, liquidity_gt: "0" }) {
+        ...PositionFields
+    }
+}
+""" + POSITION_FIELDS)
+
+# Cursor-paginated queries used by the iter_* generators
+ITER_SWAPS_QUERY = register_query("""
+query IterSwaps($pool: String!, $first: Int!, $since: BigInt!, $before: BigInt!) {
+    swaps(
+        first: $first
+        orderBy: timestamp
+        orderDirection: desc
+        where: { pool: $pool, timestamp_gte: $since, timestamp_lt: $before }
+    ) {
+        ...SwapFields
+    }
+}
+""" + SWAP_FIELDS)
+
+ITER_SWAPS_AT_TIMESTAMP_QUERY = register_query("""
+query IterSwapsAtTimestamp($pool: String!, $first: Int!, $timestamp: BigInt!, $after: String!) {
+    swaps(
+        first: $first
+        orderBy: id
+        orderDirection: asc
+        where: { pool: $pool, timestamp: $timestamp, id_gt: $after }
+    ) {
+        ...SwapFields
+    }
+}
+""" + SWAP_FIELDS)
+
+ITER_TOKEN_HISTORY_QUERY = register_query("""
+query IterTokenHistory($token: String!, $first: Int!, $since: Int!, $before: Int!) {
+    tokenDayDatas(
+        first: $first
+        orderBy: date
+        orderDirection: desc
+        where: { token: $token, date_gte: $since, date_lt: $before }
+    ) {
+        ...TokenDayDataFields
+    }
+}
+""" + TOKEN_DAY_DATA_FIELDS)
+
+ITER_POOL_DAY_DATA_QUERY = register_query("""
+query IterPoolDayData($pool: String!, $first: Int!, $since: Int!, $before: Int!) {
+    poolDayDatas(
+        first: $first
+        orderBy: date
+        orderDirection: desc
+        where: { pool: $pool, date_gte: $since, date_lt: $before }
+    ) {
+        ...PoolDayDataFields
+    }
+}
+""" + POOL_DAY_DATA_FIELDS)
+
+ITER_USER_POSITIONS_QUERY = register_query("""
+query IterUserPositions($owner: String!, $first: Int!, $after: String!) {
+    positions(
+        first: $first
+        orderBy: id
+        orderDirection: asc
+        where: { owner: $owner, id_gt: $after }
+    ) {
+        ...PositionFields
+    }
+}
+""" + POSITION_FIELDS)
+
+ITER_ACTIVE_USER_POSITIONS_QUERY = register_query("""
+query IterUserPositions($owner: String!, $first: Int!, $after: String!) {
+    positions(
+        first: $first
+        orderBy: id
+        orderDirection: asc
+        where: { owner: $owner, id_gt: $after, liquidity_gt: "0" }
+    ) {
+        ...PositionFields
+    }
+}
+""" + POSITION_FIELDS)
+
+ITER_OWNERS_POSITIONS_QUERY = register_query("""
+query IterOwnersPositions($owners: [String!]!, $first: Int!, $after: String!) {
+    positions(
+        first: $first
+        orderBy: id
+        orderDirection: asc
+        where: { owner_in: $owners, id_gt: $after }
+    ) {
+        ...PositionFields
+    }
+}
+""" + POSITION_FIELDS)
+
+ITER_ACTIVE_OWNERS_POSITIONS_QUERY = register_query("""
+query IterOwnersPositions($owners: [String!]!, $first: Int!, $after: String!) {
+    positions(
+        first: $first
+        orderBy: id
+        orderDirection: asc
+        where: { owner_in: $owners, id_gt: $after, liquidity_gt: "0" }
+    ) {
+        ...PositionFields
+    }
+}
+""" + POSITION_FIELDS)
+
+GET_TOKEN_QUERY = register_query("""
+query GetToken($id: ID!) {
+    token(id: $id) {
+        ...TokenFields
+    }
+}
+""" + TOKEN_FIELDS)
+
+GET_TOKENS_QUERY = register_query("""
+query GetTokens($ids: [ID!]!, $first: Int!) {
+    tokens(first: $first, where: { id_in: $ids }) {
+        ...TokenFields
+    }
+}
+""" + TOKEN_FIELDS)
+
+LARGE_SWAP_FIELDS = """
+fragment LargeSwapFields on Swap {
+    id
+    timestamp
+    pool {
+        id
+        token0 { symbol }
+        token1 { symbol }
+    }
+    amount0
+    amount1
+    amountUSD
+    sender
+    origin
+    transaction { id }
+}
+"""
+
+GET_LARGE_SWAPS_QUERY = register_query("""
+query GetLargeSwaps($minUSD: String!, $limit: Int!) {
+    swaps(
+        first: $limit
+        orderBy: amountUSD
+        orderDirection: desc
+        where: { amountUSD_gt: $minUSD }
+    ) {
+        ...LargeSwapFields
+    }
+}
+""" + LARGE_SWAP_FIELDS)
+
+GET_LARGE_SWAPS_SINCE_QUERY = register_query("""
+query GetLargeSwapsSince($minUSD: String!, $since: BigInt!, $first: Int!) {
+    swaps(
+        first: $first
+        orderBy: timestamp
+        orderDirection: asc
+        where: { amountUSD_gt: $minUSD, timestamp_gte: $since }
+    ) {
+        ...LargeSwapFields
+    }
+}
+""" + LARGE_SWAP_FIELDS)
+
+GET_LARGE_SWAPS_AT_TIMESTAMP_QUERY = register_query("""
+query GetLargeSwapsAtTimestamp($minUSD: String!, $timestamp: BigInt!, $after: String!, $first: Int!) {
+    swaps(
+        first: $first
+        orderBy: id
+        orderDirection: asc
+        where: { amountUSD_gt: $minUSD, timestamp: $timestamp, id_gt: $after }
+    ) {
+        ...LargeSwapFields
+    }
+}
+""" + LARGE_SWAP_FIELDS)
+
+GET_INDEXED_BLOCK_QUERY = register_query("""
+query GetIndexedBlock {
+    _meta {
+        block {
+            number
+        }
+    }
+}
+""")
+
+GET_PROTOCOL_STATS_QUERY = register_query("""
+query GetProtocolStats {
+    factory(id: "0x1F98431c8aD98523631AE4a59f267346ea31F984") {
+        poolCount
+        txCount
+        totalVolumeUSD
+        totalFeesUSD
+        totalValueLockedUSD
+    }
+}
+""")
+
+SEARCH_TOKENS_QUERY = register_query("""
+query SearchTokens($search: String!, $limit: Int!) {
+    tokens(
+        where: {
+            symbol_contains_nocase: $search
+        }
+        first: $limit
+        orderBy: volumeUSD
+        orderDirection: desc
+    ) {
+        id
+        symbol
+        name
+        volumeUSD
+        totalValueLockedUSD
+    }
+}
+""")
+
+
+class SubgraphError(Exception):
+    """A failed subgraph request; retryable errors may succeed on a later attempt"""
+
+    def __init__(
+        self,
+        message: str,
+        retryable: bool = False,
+        retry_after: Optional[float] = None,
+        status: Optional[int] = None,
+    ):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+        self.status = status
+
+
+# GraphQL error messages that will fail the same way on every attempt
+PERMANENT_GRAPHQL_ERRORS = (
+    "Syntax Error",
+    "Cannot query field",
+    "Unknown argument",
+    "Unknown type",
+    "Variable",
+    "not found",
+)
+
+
+def graphql_data(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the data member of a GraphQL response, raising on errors"""
+    if "errors" in payload:
+        messages = " ".join(str(error.get("message", error)) for error in payload["errors"])
+        permanent = any(marker in messages for marker in PERMANENT_GRAPHQL_ERRORS)
+        raise SubgraphError(f"GraphQL errors: {payload['errors']}", retryable=not permanent)
+
+    return payload["data"]
+
+
+class TokenBucket:
+    """Thread-safe token-bucket rate limiter (rate requests/sec, up to burst at once)"""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = float(burst or max(1, int(rate)))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take one token, sleeping until one is available; returns seconds waited"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait_for = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait_for > 0:
+            time.sleep(wait_for)
+        return wait_for
+
+    def try_acquire(self) -> bool:
+        """Take one token only if one is available now; never sleeps"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class RetryPolicy:
+    """Retry transient failures with full-jitter exponential backoff"""
+
+    def __init__(self, max_attempts: int = 4, base_delay: float = 0.25, max_delay: float = 8.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Seconds to wait before retry number attempt (1-based)"""
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+NO_RETRY = RetryPolicy(max_attempts=1)
+
+# Responses pinned to a block number never change, so they never expire
+PINNED_CACHE_TTL = float("inf")
+
+
+# Per-operation cache TTLs in seconds (0 disables caching for that operation)
+DEFAULT_CACHE_TTLS = {
+    "GetIndexedBlock": 0.0,
+    "GetToken": 300.0,
+    "GetTokens": 300.0,
+    "GetProtocolStats": 60.0,
+    "GetTopPools": 60.0,
+    "SearchTokens": 300.0,
+}
+
+
+class ResponseCache:
+    """Thread-safe in-memory TTL + LRU cache for subgraph responses
+
+    Entries are keyed by endpoint, query hash and variables. Each
+    operation gets its TTL from ttls (falling back to default_ttl), and the
+    least recently used entry is evicted once max_entries is reached.
+    Cached results are shared between callers and must not be mutated.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        default_ttl: float = 10.0,
+        ttls: Optional[Dict[str, float]] = None,
+    ):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.ttls = dict(DEFAULT_CACHE_TTLS if ttls is None else ttls)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(endpoint: str, query: str, variables: Optional[Dict] = None) -> Tuple[str, str, str]:
+        """Build the cache key for a request (the query is keyed by its hash)"""
+        return (endpoint, compile_query(query).sha256, json.dumps(variables or {}, sort_keys=True))
+
+    def ttl_for(self, query: str) -> float:
+        """TTL in seconds for the operation named in query"""
+        return self.ttls.get(compile_query(query).name, self.default_ttl)
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[Any]:
+        """Return a fresh cached value, or None on miss/expiry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: Tuple[str, str, str], value: Any, ttl: float) -> None:
+        """Store value for ttl seconds, evicting the LRU entry when full"""
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+# Histogram bucket upper bounds: request latency in seconds, response size in bytes
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+DEFAULT_SIZE_BUCKETS = (1024, 10 * 1024, 100 * 1024, 1024**2, 10 * 1024**2)
+
+
+class QueryMetrics:
+    """Thread-safe request metrics labeled by operation name and endpoint
+
+    Each observed HTTP attempt (retries, hedges and persisted-query legs
+    included) adds to a latency histogram, a response-size histogram and
+    per-kind error counters. Export with snapshot() or to_prometheus().
+    One instance can be shared by several clients.
+    """
+
+    def __init__(
+        self,
+        latency_buckets: Tuple[float, ...] = DEFAULT_LATENCY_BUCKETS,
+        size_buckets: Tuple[int, ...] = DEFAULT_SIZE_BUCKETS,
+    ):
+        self.latency_buckets = tuple(sorted(latency_buckets))
+        self.size_buckets = tuple(sorted(size_buckets))
+        self._series: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, event: Dict[str, Any]) -> None:
+        """Record one request event (operation, endpoint, seconds, bytes, error)"""
+        label = (event["operation"], event["endpoint"])
+        seconds = event["seconds"]
+        nbytes = event.get("bytes") or 0
+        with self._lock:
+            series = self._series.get(label)
+            if series is None:
+                series = self._series[label] = {
+                    "requests": 0,
+                    "errors": {},
+                    "latency": [0] * (len(self.latency_buckets) + 1),
+                    "latency_sum": 0.0,
+                    "latency_max": 0.0,
+                    "size": [0] * (len(self.size_buckets) + 1),
+                    "bytes": 0,
+                }
+            series["requests"] += 1
+            series["latency"][_bucket(self.latency_buckets, seconds)] += 1
+            series["latency_sum"] += seconds
+            series["latency_max"] = max(series["latency_max"], seconds)
+            series["size"][_bucket(self.size_buckets, nbytes)] += 1
+            series["bytes"] += nbytes
+            if event.get("error"):
+                errors = series["errors"]
+                errors[event["error"]] = errors.get(event["error"], 0) + 1
+
+    def reset(self) -> None:
+        """Drop every series"""
+        with self._lock:
+            self._series.clear()
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Current metrics as {operation: {endpoint: {...}}}
+
+        p50/p99 are estimated as the upper bound of the histogram bucket
+        holding that rank (the observed max for the overflow bucket).
+        """
+        with self._lock:
+            series = {label: {**s, "errors": dict(s["errors"]), "latency": list(s["latency"]),
+                              "size": list(s["size"])} for label, s in self._series.items()}
+
+        out: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for (operation, endpoint), s in sorted(series.items()):
+            count = s["requests"]
+            out.setdefault(operation, {})[endpoint] = {
+                "requests": count,
+                "errors": s["errors"],
+                "error_count": sum(s["errors"].values()),
+                "latency": {
+                    "mean": s["latency_sum"] / count if count else 0.0,
+                    "max": s["latency_max"],
+                    "p50": _quantile(self.latency_buckets, s["latency"], 0.50, s["latency_max"]),
+                    "p99": _quantile(self.latency_buckets, s["latency"], 0.99, s["latency_max"]),
+                    "sum": s["latency_sum"],
+                    "buckets": _cumulative(self.latency_buckets, s["latency"]),
+                },
+                "bytes": {
+                    "total": s["bytes"],
+                    "mean": s["bytes"] / count if count else 0.0,
+                    "buckets": _cumulative(self.size_buckets, s["size"]),
+                },
+            }
+        return out
+
+    def to_prometheus(self, prefix: str = "subgraph") -> str:
+        """Metrics in the Prometheus text exposition format"""
+        snapshot = self.snapshot()
+        series = [
+            (_prometheus_labels(operation=operation, endpoint=endpoint), data)
+            for operation, endpoints in snapshot.items()
+            for endpoint, data in endpoints.items()
+        ]
+        lines = [
+            f"# HELP {prefix}_requests_total Subgraph HTTP requests sent",
+            f"# TYPE {prefix}_requests_total counter",
+        ]
+        lines += [f"{prefix}_requests_total{{{labels}}} {data['requests']}" for labels, data in series]
+
+        lines += [
+            f"# HELP {prefix}_request_errors_total Failed subgraph requests by error kind",
+            f"# TYPE {prefix}_request_errors_total counter",
+        ]
+        for labels, data in series:
+            for kind, count in sorted(data["errors"].items()):
+                lines.append(f"{prefix}_request_errors_total{{{labels},{_prometheus_labels(kind=kind)}}} {count}")
+
+        for name, key, help_text in (
+            ("request_duration_seconds", "latency", "Subgraph request latency"),
+            ("response_size_bytes", "bytes", "Subgraph response body size"),
+        ):
+            metric = f"{prefix}_{name}"
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+            for labels, data in series:
+                for le, count in data[key]["buckets"].items():
+                    lines.append(f'{metric}_bucket{{{labels},le="{le}"}} {count}')
+                total = data[key]["sum"] if key == "latency" else data[key]["total"]
+                lines.append(f"{metric}_sum{{{labels}}} {total}")
+                lines.append(f"{metric}_count{{{labels}}} {data['requests']}")
+        return "\n".join(lines) + "\n"
+
+
+def _bucket(bounds: Tuple[float, ...], value: float) -> int:
+    """Index of the first bucket whose upper bound is >= value (len(bounds) if none)"""
+    for index, bound in enumerate(bounds):
+        if value <= bound:
+            return index
+    return len(bounds)
+
+
+def _cumulative(bounds: Tuple[float, ...], counts: List[int]) -> Dict[str, int]:
+    """Per-bucket counts as Prometheus-style cumulative {le: count}, ending with +Inf"""
+    out, total = {}, 0
+    for bound, count in zip(list(bounds) + ["+Inf"], counts):
+        total += count
+        out[str(bound)] = total
+    return out
+
+
+def _quantile(bounds: Tuple[float, ...], counts: List[int], q: float, maximum: float) -> float:
+    """Upper bound of the bucket containing quantile q"""
+    total = sum(counts)
+    if not total:
+        return 0.0
+    rank, seen = q * total, 0
+    for index, count in enumerate(counts):
+        seen += count
+        if seen >= rank:
+            return bounds[index] if index < len(bounds) else maximum
+    return maximum
+
+
+def _prometheus_labels(**labels: str) -> str:
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in labels.items()
+    )
+    return ",".join(f'{name}="{value}"' for name, value in escaped)
+
+
+# Connection pool defaults
+DEFAULT_POOL_SIZE = 10
+DEFAULT_TIMEOUT = (5.0, 30.0)  # (connect, read) seconds
+
+# Pagination defaults (The Graph caps `first` at 1000)
+MAX_PAGE_SIZE = 1000
+MAX_TIMESTAMP = 2**63 - 1
+MAX_DATE = 2**31 - 1  # date fields are Int, not BigInt
+
+# Addresses per id_in batch; 100 keeps the request body around 5 KB
+DEFAULT_BATCH_SIZE = 100
+
+# Bytes read per chunk when streaming a response body
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def iter_json_array(chunks: Iterable[str], key: str) -> Iterator[Dict[str, Any]]:
+    """Incrementally decode the list under "key" in a streamed GraphQL response
+
+    Yields each element as soon as its closing brace has arrived, keeping
+    only the undecoded tail of the body in memory. Responses without the
+    list (e.g. GraphQL errors) are parsed whole and raised as SubgraphError.
+    """
+    decoder = json.JSONDecoder()
+    marker = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+    chunks = iter(chunks)
+    buffer = ""
+    for chunk in chunks:
+        buffer += chunk
+        match = marker.search(buffer)
+        if match:
+            buffer = buffer[match.end():]
+            break
+    else:
+        graphql_data(json.loads(buffer or "{}"))
+        raise SubgraphError(f"Response has no {key} list: {buffer[:200]}")
+
+    position = 0
+    while True:
+        while position < len(buffer) and buffer[position] in " \t\r\n,":
+            position += 1
+        if position < len(buffer):
+            if buffer[position] == "]":
+                return
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                end = None  # element not complete yet
+            if end is not None:
+                position = end
+                yield value
+                continue
+
+        chunk = next(chunks, None)
+        if chunk is None:
+            raise SubgraphError(f"Truncated response while reading {key}", retryable=True)
+        buffer = buffer[position:] + chunk
+        position = 0
+
 
 class UniswapSubgraph:
-    """Wrapper for Uniswap Subgraph queries"""
+    """Wrapper for Uniswap Subgraph queries
+
+    All get_* methods share one pooled keep-alive HTTP session, so repeated
+    queries reuse open TCP/TLS connections instead of reconnecting each time.
+    Use the client as a context manager (or call close()) to release them.
+
+    Pass a ResponseCache to serve repeated reads from memory within each
+    operation's freshness window. Concurrent identical queries (same text
+    and variables) share one in-flight request unless coalesce=False.
+    Results served from the cache or a shared request are the same object
+    for every caller: treat query results as read-only and copy before
+    mutating.
+
+    Transient failures (429, 5xx, timeouts, retryable GraphQL errors) are
+    retried with jittered exponential backoff. rate_limit caps requests per
+    second with a token bucket, and hedge_after sends a duplicate request
+    when the first has not answered within that many seconds. Counters are
+    kept in self.stats.
+
+    Every query is sent as compact, precompiled text. With
+    persisted_queries=True only its SHA-256 hash is sent (automatic
+    persisted queries), falling back to the full text when the server
+    does not know the hash or does not support the protocol.
 
-    def __init__(self, endpoint: str = UNISWAP_V3_MAINNET):
+    Every HTTP attempt is recorded in self.metrics (a QueryMetrics, which
+    may be shared between clients) and passed to hooks registered with
+    add_hook() as an event dict with operation, endpoint, variables,
+    status, bytes, seconds and error.
+
+    With block set, every query reads the subgraph as of that block
+    number, so separate calls see one consistent state; snapshot() returns
+    such a pinned copy. Pinned responses never change and are cached
+    without expiry.
+    """
+
+    def __init__(
+        self,
+        endpoint: str = UNISWAP_V3_MAINNET,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        timeout: Union[float, Tuple[float, float], None] = DEFAULT_TIMEOUT,
+        keep_alive: bool = True,
+        session: Optional[requests.Session] = None,
+        cache: Optional[ResponseCache] = None,
+        retry: RetryPolicy = RetryPolicy(),
+        rate_limit: Union[float, TokenBucket, None] = None,
+        hedge_after: Optional[float] = None,
+        persisted_queries: bool = False,
+        metrics: Optional[QueryMetrics] = None,
+        block: Optional[int] = None,
+        coalesce: bool = True,
+    ):
         self.endpoint = endpoint
+        self.block = block
+        self.timeout = timeout
+        self.cache = cache
+        self.retry = retry
+        self.rate_limiter = TokenBucket(rate_limit) if isinstance(rate_limit, (int, float)) else rate_limit
+        self.hedge_after = hedge_after
+        self.persisted_queries = persisted_queries
+        self.coalesce = coalesce
+        self.pool_size = pool_size
+        # throttled counts server 429s; rate_limited counts local token-bucket waits
+        self.stats = {
+            "requests": 0, "retries": 0, "throttled": 0, "rate_limited": 0, "hedged": 0, "failures": 0,
+            "persisted_query_misses": 0, "coalesced": 0,
+        }
+        self._stats_lock = threading.Lock()
+        self._inflight: Dict[Tuple[str, str, str], Future] = {}
+        self._inflight_lock = threading.Lock()
+        self.metrics = metrics if metrics is not None else QueryMetrics()
+        self._before_hooks: List[Callable[[Dict[str, Any]], None]] = []
+        self._after_hooks: List[Callable[[Dict[str, Any]], None]] = []
+        self._hedge_pool: Optional[ThreadPoolExecutor] = None
+        self._hedge_lock = threading.Lock()
+        self._owns_session = session is None
+        self.session = session or self._build_session(pool_size, keep_alive)
+
+    @staticmethod
+    def _build_session(pool_size: int, keep_alive: bool) -> requests.Session:
+        """Create a session whose connection pool holds pool_size sockets per host"""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({
+            "Content-Type": "application/json",
+            "Connection": "keep-alive" if keep_alive else "close",
+        })
+        return session
+
+    def close(self) -> None:
+        """Close pooled connections (only if the session is owned by this client)"""
+        with self._hedge_lock:
+            if self._hedge_pool is not None:
+                self._hedge_pool.shutdown(wait=False)
+                self._hedge_pool = None
+        if self._owns_session:
+            self.session.close()
+
+    def __enter__(self) -> "UniswapSubgraph":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def add_hook(
+        self,
+        before: Optional[Callable[[Dict[str, Any]], None]] = None,
+        after: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> None:
+        """Register callbacks run before and after every HTTP attempt
+
+        before(event) sees operation, endpoint and variables. after(event)
+        also gets status, bytes, seconds and error (None, "graphql",
+        "timeout", "connection", "http_<status>" or an exception name).
+        """
+        if before is not None:
+            self._before_hooks.append(before)
+        if after is not None:
+            self._after_hooks.append(after)
+
+    def snapshot(self, block: Optional[int] = None) -> "UniswapSubgraph":
+        """Return a copy of this client pinned to one block (the latest indexed by default)
+
+        The copy shares the session, metrics, hooks and stats, and uses this
+        client's cache (or a private one) to keep pinned responses for good.
+        Closing it leaves the shared session open.
+        """
+        pinned = copy.copy(self)
+        pinned.block = self.get_indexed_block() if block is None else int(block)
+        pinned.cache = self.cache if self.cache is not None else ResponseCache()
+        pinned._owns_session = False
+        pinned._hedge_pool = None
+        pinned._hedge_lock = threading.Lock()
+        return pinned
+
+    def get_indexed_block(self) -> int:
+        """Latest block number the subgraph has indexed (the pinned block if set)"""
+        return int(self.query(GET_INDEXED_BLOCK_QUERY)["_meta"]["block"]["number"])
 
     def query(self, query: str, variables: Optional[Dict] = None) -> Dict[str, Any]:
         """Execute a GraphQL query against the subgraph"""
-        response = requests.post(
-            self.endpoint,
-            json={"query": query, "variables": variables or {}},
-            headers={"Content-Type": "application/json"},
-        )
-        response.raise_for_status()
+        if self.block is not None:
+            query, variables = self._pin(query, variables)
+            ttl = PINNED_CACHE_TTL if self.cache is not None else 0
+        else:
+            ttl = self.cache.ttl_for(query) if self.cache is not None else 0
+        if ttl <= 0 and not self.coalesce:
+            return self._execute(query, variables)
 
-        data = response.json()
-        if "errors" in data:
-            raise Exception(f"GraphQL errors: {data['errors']}")
+        key = ResponseCache.key(self.endpoint, query, variables)
+        if ttl > 0:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        if not self.coalesce:
+            data = self._execute(query, variables)
+            self.cache.set(key, data, ttl)
+            return data
 
-        return data["data"]
+        # Single flight: the first caller for a key sends the request and the
+        # rest wait on its future instead of sending their own
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        if not leader:
+            self._count("coalesced")
+            return future.result()
+        try:
+            data = self._execute(query, variables)
+            if ttl > 0:
+                self.cache.set(key, data, ttl)
+            future.set_result(data)
+            return data
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
 
-    def get_pool(self, pool_address: str) -> Dict[str, Any]:
-        """Get pool information by address"""
-        query = """
-        query GetPool($id: ID!) {
-            pool(id: $id) {
-                id
-                token0 {
-                    id
-                    symbol
-                    name
-                    decimals
-                }
-                token1 {
-                    id
-                    symbol
-                    name
-                    decimals
-                }
-                feeTier
-                liquidity
-                sqrtPrice
-                tick
-                token0Price
-                token1Price
-                volumeUSD
-                volumeToken0
-                volumeToken1
-                feesUSD
-                txCount
-                totalValueLockedToken0
-                totalValueLockedToken1
-                totalValueLockedUSD
-            }
+    def query_stream(
+        self, query: str, variables: Optional[Dict] = None, key: Optional[str] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Execute a query and yield the entities of its root list as they arrive
+
+        The response body is parsed incrementally, so the first entity is
+        available before the page has finished downloading and the whole page
+        is never held in memory at once. key defaults to the root field name.
+        Streamed results bypass the response cache.
+        """
+        compiled = compile_query(query)
+        if key is None:
+            name_end, _, _ = root_field_span(compiled)
+            key = compiled[:name_end].split()[-1]
+        if self.block is not None:
+            compiled, variables = self._pin(compiled, variables)
+        response = self._execute(compiled, variables, send=self._open_stream)
+        with response:
+            response.encoding = "utf-8"
+            chunks = response.iter_content(STREAM_CHUNK_SIZE, decode_unicode=True)
+            yield from iter_json_array(chunks, key)
+
+    def _pin(self, query: str, variables: Optional[Dict]) -> Tuple[CompiledQuery, Dict[str, Any]]:
+        """Rewrite a query and its variables to read at self.block"""
+        return pin_to_block(compile_query(query)), {**(variables or {}), "block": self.block}
+
+    def _execute(
+        self,
+        query: str,
+        variables: Optional[Dict] = None,
+        send: Optional[Callable[[str, Optional[Dict]], Any]] = None,
+    ) -> Any:
+        """Send a query, retrying transient failures according to self.retry"""
+        if send is None:
+            send = self._send if self.hedge_after is None else self._send_hedged
+        attempt = 1
+        while True:
+            if self.rate_limiter is not None and self.rate_limiter.acquire() > 0:
+                self._count("rate_limited")
+            try:
+                return send(query, variables)
+            except SubgraphError as e:
+                if not e.retryable or attempt >= self.retry.max_attempts:
+                    self._count("failures")
+                    raise
+                time.sleep(self.retry.delay(attempt, e.retry_after))
+                self._count("retries")
+                attempt += 1
+
+    def _send(self, query: str, variables: Optional[Dict] = None) -> Dict[str, Any]:
+        """Send a query over the pooled session once
+
+        With persisted queries enabled only the query hash is sent. If the
+        server has not seen it yet the full text follows with the hash. A
+        PersistedQueryNotSupported error or a 4xx rejection of the hash-only
+        body (as graph-node answers) turns persisted queries off and sends
+        the full text instead. Other GraphQL errors raise as usual.
+        """
+        compiled = compile_query(query)
+        variables = variables or {}
+        if not self.persisted_queries:
+            return graphql_data(self._post({"query": compiled, "variables": variables}, compiled.name))
+
+        extensions = {"persistedQuery": {"version": 1, "sha256Hash": compiled.sha256}}
+        try:
+            payload: Optional[Dict[str, Any]] = self._post(
+                {"variables": variables, "extensions": extensions}, compiled.name
+            )
+        except requests.HTTPError as e:
+            if e.response is None or not 400 <= e.response.status_code < 500:
+                raise
+            payload = None
+
+        error = _persisted_query_error(payload) if payload is not None else "PersistedQueryNotSupported"
+        if error is None:
+            return graphql_data(payload)
+        self._count("persisted_query_misses")
+        if error == "PersistedQueryNotFound":
+            payload = self._post(
+                {"query": compiled, "variables": variables, "extensions": extensions}, compiled.name
+            )
+        else:
+            self.persisted_queries = False
+            payload = self._post({"query": compiled, "variables": variables}, compiled.name)
+        return graphql_data(payload)
+
+    def _post(self, body: Dict[str, Any], operation: str) -> Dict[str, Any]:
+        """POST one request body and return the decoded JSON payload"""
+        with self._instrumented(operation, body) as event:
+            response = self._request(body)
+            event["status"] = response.status_code
+            event["bytes"] = len(response.content)
+            payload = response.json()
+            if "errors" in payload and _persisted_query_error(payload) is None:
+                event["error"] = "graphql"
+            return payload
+
+    def _open_stream(self, query: str, variables: Optional[Dict] = None) -> requests.Response:
+        """POST a query and return the response with its body still unread
+
+        Streamed requests are timed to the response headers and sized by
+        Content-Length, since the body is consumed later by the caller.
+        """
+        compiled = compile_query(query)
+        body = {"query": compiled, "variables": variables or {}}
+        with self._instrumented(compiled.name, body) as event:
+            response = self._request(body, stream=True)
+            event["status"] = response.status_code
+            event["bytes"] = int(response.headers.get("Content-Length") or 0)
+            return response
+
+    @contextlib.contextmanager
+    def _instrumented(self, operation: str, body: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Run hooks around one HTTP attempt and record it in self.metrics"""
+        event: Dict[str, Any] = {
+            "operation": operation,
+            "endpoint": self.endpoint,
+            "variables": body.get("variables"),
+            "status": None,
+            "bytes": 0,
+            "seconds": 0.0,
+            "error": None,
         }
+        for hook in self._before_hooks:
+            hook(event)
+        started = time.perf_counter()
+        try:
+            yield event
+        except Exception as e:
+            event["error"] = _error_kind(e)
+            if isinstance(e, SubgraphError) and e.status is not None:
+                event["status"] = e.status
+            raise
+        finally:
+            event["seconds"] = time.perf_counter() - started
+            self.metrics.observe(event)
+            for hook in self._after_hooks:
+                hook(event)
+
+    def _request(self, body: Dict[str, Any], stream: bool = False) -> requests.Response:
+        """POST one request body, raising SubgraphError for retryable failures"""
+        self._count("requests")
+        try:
+            response = self.session.post(self.endpoint, json=body, timeout=self.timeout, stream=stream)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            raise SubgraphError(f"Request failed: {e}", retryable=True) from e
+
+        if response.status_code == 429 or response.status_code >= 500:
+            if response.status_code == 429:
+                self._count("throttled")
+            raise SubgraphError(
+                f"HTTP {response.status_code} from {self.endpoint}",
+                retryable=True,
+                retry_after=_retry_after(response),
+                status=response.status_code,
+            )
+        response.raise_for_status()
+
+        return response
+
+    def _send_hedged(self, query: str, variables: Optional[Dict] = None) -> Dict[str, Any]:
+        """Send a query, racing a duplicate if the first is slower than hedge_after
+
+        The hedge_after timer starts once the first request is actually
+        running, not while it waits for a worker. The duplicate needs its own
+        rate-limit token; if none is available right away the hedge is
+        skipped rather than exceeding rate_limit.
         """
+        with self._hedge_lock:
+            if self._hedge_pool is None:
+                # Room for a first request and a hedge on every pooled connection
+                self._hedge_pool = ThreadPoolExecutor(max_workers=2 * max(self.pool_size, 1))
+            pool = self._hedge_pool
+        started = threading.Event()
+
+        def first() -> Dict[str, Any]:
+            started.set()
+            return self._send(query, variables)
+
+        pending = {pool.submit(first)}
+        started.wait()
+        done, pending = wait(pending, timeout=self.hedge_after)
+        if not done and (self.rate_limiter is None or self.rate_limiter.try_acquire()):
+            self._count("hedged")
+            pending.add(pool.submit(self._send, query, variables))
+
+        error: Optional[BaseException] = None
+        while True:
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+            if not pending:
+                raise error
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+    def _count(self, name: str) -> None:
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def get_pool(self, pool_address: str, fields: FieldSet = None) -> Dict[str, Any]:
+        """Get pool information by address"""
+        query = project(GET_POOL_QUERY, fields, "Pool")
         result = self.query(query, {"id": pool_address.lower()})
         return result["pool"]
 
-    def get_top_pools(self, limit: int = 10) -> List[Dict[str, Any]]:
+    def get_pools(
+        self,
+        pool_addresses: List[str],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        fields: FieldSet = None,
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Get many pools in id_in batches, keyed by lowercase address (None if missing)"""
+        query = project(GET_POOLS_QUERY, fields, "Pool", required=("id",))
+        return self._get_many(query, "pools", pool_addresses, batch_size)
+
+    def get_top_pools(self, limit: int = 10, fields: FieldSet = None) -> List[Dict[str, Any]]:
         """Get top pools by volume"""
-        query = """
-        query GetTopPools($limit: Int!) {
-            pools(
-                first: $limit
-                orderBy: volumeUSD
-                orderDirection: desc
-            ) {
-                id
-                token0 { symbol }
-                token1 { symbol }
-                feeTier
-                volumeUSD
-                totalValueLockedUSD
-                token0Price
-                token1Price
-            }
-        }
-        """
+        query = project(GET_TOP_POOLS_QUERY, fields, "Pool")
         result = self.query(query, {"limit": limit})
         return result["pools"]
 
     def get_recent_swaps(
-        self, pool_address: str, limit: int = 100
+        self, pool_address: str, limit: int = 100, fields: FieldSet = None
     ) -> List[Dict[str, Any]]:
         """Get recent swaps for a pool"""
-        query = """
-        query GetRecentSwaps($pool: String!, $limit: Int!) {
-            swaps(
-                first: $limit
-                orderBy: timestamp
-                orderDirection: desc
-                where: { pool: $pool }
-            ) {
-                id
-                timestamp
-                sender
-                recipient
-                amount0
-                amount1
-                amountUSD
-                sqrtPriceX96
-                tick
-                transaction {
-                    id
-                    blockNumber
-                }
-            }
-        }
-        """
+        query = project(GET_RECENT_SWAPS_QUERY, fields, "Swap")
         result = self.query(query, {"pool": pool_address.lower(), "limit": limit})
         return result["swaps"]
 
     def get_token_price_history(
-        self, token_address: str, days: int = 30
+        self, token_address: str, days: int = 30, fields: FieldSet = None
     ) -> List[Dict[str, Any]]:
         """Get token price history"""
-        query = """
-        query GetTokenHistory($token: String!, $limit: Int!) {
-            tokenDayDatas(
-                first: $limit
-                orderBy: date
-                orderDirection: desc
-                where: { token: $token }
-            ) {
-                date
-                priceUSD
-                volumeUSD
-                totalValueLockedUSD
-                open
-                high
-                low
-                close
-            }
-        }
-        """
+        query = project(GET_TOKEN_HISTORY_QUERY, fields, "TokenDayData")
         result = self.query(query, {"token": token_address.lower(), "limit": days})
         return result["tokenDayDatas"]
 
     def get_pool_day_data(
-        self, pool_address: str, days: int = 7
+        self, pool_address: str, days: int = 7, fields: FieldSet = None
     ) -> List[Dict[str, Any]]:
         """Get pool statistics over time"""
-        query = """
-        query GetPoolDayData($pool: String!, $limit: Int!) {
-            poolDayDatas(
-                first: $limit
-                orderBy: date
-                orderDirection: desc
-                where: { pool: $pool }
-            ) {
-                date
-                volumeUSD
-                tvlUSD
-                feesUSD
-                txCount
-                open
-                high
-                low
-                close
-            }
-        }
-        """
+        query = project(GET_POOL_DAY_DATA_QUERY, fields, "PoolDayData")
         result = self.query(query, {"pool": pool_address.lower(), "limit": days})
         return result["poolDayDatas"]
 
     def get_user_positions(
-        self, user_address: str, active_only: bool = True
+        self, user_address: str, active_only: bool = True, fields: FieldSet = None
     ) -> List[Dict[str, Any]]:
         """Get liquidity positions for a user"""
-        where_clause = '{ owner: $owner, liquidity_gt: "0" }' if active_only else '{ owner: $owner }'
-
-        query = f"""
-        query GetUserPositions($owner: String!) {{
-            positions(where: {where_clause}) {{
-                id
-                owner
-                pool {{
-                    id
-                    token0 {{ symbol }}
-                    token1 {{ symbol }}
-                }}
-                liquidity
-                tickLower {{ tickIdx }}
-                tickUpper {{ tickIdx }}
-                depositedToken0
-                depositedToken1
-                withdrawnToken0
-                withdrawnToken1
-                collectedFeesToken0
-                collectedFeesToken1
-            }}
-        }}
-        """
+        query = GET_ACTIVE_USER_POSITIONS_QUERY if active_only else GET_USER_POSITIONS_QUERY
+        query = project(query, fields, "Position")
         result = self.query(query, {"owner": user_address.lower()})
         return result["positions"]
 
-    def get_token_info(self, token_address: str) -> Dict[str, Any]:
-        """Get token information and statistics"""
-        query = """
-        query GetToken($id: ID!) {
-            token(id: $id) {
-                id
-                symbol
-                name
-                decimals
-                totalSupply
-                volume
-                volumeUSD
-                feesUSD
-                txCount
-                totalValueLocked
-                totalValueLockedUSD
-                derivedETH
-            }
-        }
+    def iter_swaps(
+        self,
+        pool_address: str,
+        since: Optional[int] = None,
+        before: Optional[int] = None,
+        page_size: int = MAX_PAGE_SIZE,
+        fields: FieldSet = None,
+        stream: bool = False,
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield every swap for a pool, newest first, one page at a time
+
+        Pages with a timestamp_lt cursor. When a full page ends inside a run
+        of swaps sharing one timestamp, the next page re-includes that
+        timestamp and skips the ids already yielded. Only a page made up
+        entirely of one timestamp is drained separately, by id_gt.
+        With stream=True each page is decoded incrementally (see query_stream).
         """
+        page_query = project(ITER_SWAPS_QUERY, fields, "Swap", required=("id", "timestamp"))
+        tie_query = project(ITER_SWAPS_AT_TIMESTAMP_QUERY, fields, "Swap", required=("id", "timestamp"))
+        pool = pool_address.lower()
+        since = str(since or 0)
+        before = before or MAX_TIMESTAMP
+        # Ids already yielded at the timestamp the next page starts from
+        skip_timestamp, skip_ids = None, set()
+        while True:
+            page = self._page(page_query, {
+                "pool": pool, "first": page_size, "since": since, "before": str(before),
+            }, "swaps", stream)
+
+            count = 0
+            boundary = None
+            run_ids: Set[str] = set()
+            for swap in page:
+                count += 1
+                if swap["timestamp"] != boundary:
+                    boundary = swap["timestamp"]
+                    run_ids = set()
+                run_ids.add(swap["id"])
+                if swap["timestamp"] != skip_timestamp or swap["id"] not in skip_ids:
+                    yield swap
+            if count < page_size:
+                return
+
+            if len(run_ids) < count:
+                # The boundary run may continue: include its timestamp again
+                skip_timestamp, skip_ids = boundary, run_ids
+                before = int(boundary) + 1
+                continue
+
+            # The whole page shares one timestamp, so a timestamp cursor cannot
+            # move past it: drain that timestamp by id instead
+            if boundary == skip_timestamp:
+                run_ids |= skip_ids
+            after = ""
+            while True:
+                tied = 0
+                for swap in self._page(tie_query, {
+                    "pool": pool, "first": page_size, "timestamp": boundary, "after": after,
+                }, "swaps", stream):
+                    tied += 1
+                    after = swap["id"]
+                    if swap["id"] not in run_ids:
+                        yield swap
+                if tied < page_size:
+                    break
+            skip_timestamp, skip_ids = None, set()
+            before = int(boundary)
+
+    def iter_token_price_history(
+        self,
+        token_address: str,
+        since: Optional[int] = None,
+        before: Optional[int] = None,
+        page_size: int = MAX_PAGE_SIZE,
+        fields: FieldSet = None,
+        stream: bool = False,
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield daily token data, newest first, paging with a date_lt cursor"""
+        query = project(ITER_TOKEN_HISTORY_QUERY, fields, "TokenDayData", required=("date",))
+        variables = {"token": token_address.lower()}
+        yield from self._iter_by_date(
+            query, variables, "tokenDayDatas", since, before, page_size, stream
+        )
+
+    def iter_pool_day_data(
+        self,
+        pool_address: str,
+        since: Optional[int] = None,
+        before: Optional[int] = None,
+        page_size: int = MAX_PAGE_SIZE,
+        fields: FieldSet = None,
+        stream: bool = False,
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield daily pool data, newest first, paging with a date_lt cursor"""
+        query = project(ITER_POOL_DAY_DATA_QUERY, fields, "PoolDayData", required=("date",))
+        variables = {"pool": pool_address.lower()}
+        yield from self._iter_by_date(
+            query, variables, "poolDayDatas", since, before, page_size, stream
+        )
+
+    def iter_user_positions(
+        self,
+        user_address: str,
+        active_only: bool = True,
+        page_size: int = MAX_PAGE_SIZE,
+        fields: FieldSet = None,
+        stream: bool = False,
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield every position owned by a user, paging with an id_gt cursor"""
+        query = ITER_ACTIVE_USER_POSITIONS_QUERY if active_only else ITER_USER_POSITIONS_QUERY
+        query = project(query, fields, "Position", required=("id",))
+        owner = user_address.lower()
+        after = ""
+        while True:
+            count = 0
+            variables = {"owner": owner, "first": page_size, "after": after}
+            for position in self._page(query, variables, "positions", stream):
+                count += 1
+                after = position["id"]
+                yield position
+            if count < page_size:
+                return
+
+    def get_positions_for_owners(
+        self,
+        owner_addresses: Iterable[str],
+        active_only: bool = True,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        page_size: int = MAX_PAGE_SIZE,
+        max_workers: int = DEFAULT_POOL_SIZE,
+        fields: FieldSet = None,
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Get the positions of many owners, keyed by lowercase owner (empty list if none)
+
+        Owners are queried batch_size at a time with owner_in, each batch is
+        paged with an id_gt cursor, and up to max_workers batches run at once,
+        so thousands of wallets cost a few dozen requests.
+        """
+        query = ITER_ACTIVE_OWNERS_POSITIONS_QUERY if active_only else ITER_OWNERS_POSITIONS_QUERY
+        query = project(query, fields, "Position", required=("id", "owner"))
+        owners = list(dict.fromkeys(address.lower() for address in owner_addresses))
+        results: Dict[str, List[Dict[str, Any]]] = {owner: [] for owner in owners}
+        batch_size = min(batch_size, MAX_PAGE_SIZE)
+        batches = [owners[start:start + batch_size] for start in range(0, len(owners), batch_size)]
+        if not batches:
+            return results
+
+        def fetch(batch: List[str]) -> List[Dict[str, Any]]:
+            return list(self._iter_owner_batch(query, batch, page_size))
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(batches)))) as executor:
+            for positions in executor.map(fetch, batches):
+                for position in positions:
+                    results[position["owner"].lower()].append(position)
+        return results
+
+    def _iter_owner_batch(self, query: str, owners: List[str], page_size: int) -> Iterator[Dict[str, Any]]:
+        """Page through the positions of one owner_in batch with an id_gt cursor"""
+        after = ""
+        while True:
+            positions = self.query(query, {"owners": owners, "first": page_size, "after": after})["positions"]
+            yield from positions
+            if len(positions) < page_size:
+                return
+            after = positions[-1]["id"]
+
+    def _iter_by_date(
+        self,
+        query: str,
+        variables: Dict[str, Any],
+        key: str,
+        since: Optional[int],
+        before: Optional[int],
+        page_size: int,
+        stream: bool = False,
+    ) -> Iterator[Dict[str, Any]]:
+        """Page through day data (one row per date) with a date_lt cursor"""
+        since = since or 0
+        before = before or MAX_DATE
+        while True:
+            count = 0
+            page_variables = {**variables, "first": page_size, "since": since, "before": before}
+            for day in self._page(query, page_variables, key, stream):
+                count += 1
+                before = day["date"]
+                yield day
+            if count < page_size:
+                return
+
+    def _page(
+        self, query: str, variables: Dict[str, Any], key: str, stream: bool
+    ) -> Iterable[Dict[str, Any]]:
+        """One page of a root list, either decoded whole or streamed"""
+        if stream:
+            return self.query_stream(query, variables, key)
+        return self.query(query, variables)[key]
+
+    def get_token_info(self, token_address: str, fields: FieldSet = None) -> Dict[str, Any]:
+        """Get token information and statistics"""
+        query = project(GET_TOKEN_QUERY, fields, "Token")
         result = self.query(query, {"id": token_address.lower()})
         return result["token"]
 
+    def get_tokens(
+        self,
+        token_addresses: List[str],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        fields: FieldSet = None,
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Get many tokens in id_in batches, keyed by lowercase address (None if missing)"""
+        query = project(GET_TOKENS_QUERY, fields, "Token", required=("id",))
+        return self._get_many(query, "tokens", token_addresses, batch_size)
+
+    def _get_many(
+        self, query: str, key: str, addresses: List[str], batch_size: int
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Fetch entities by id with one request per batch of at most batch_size ids"""
+        ids = list(dict.fromkeys(address.lower() for address in addresses))
+        results: Dict[str, Optional[Dict[str, Any]]] = dict.fromkeys(ids)
+        batch_size = min(batch_size, MAX_PAGE_SIZE)
+        for start in range(0, len(ids), batch_size):
+            batch = ids[start:start + batch_size]
+            for entity in self.query(query, {"ids": batch, "first": len(batch)})[key]:
+                results[entity["id"]] = entity
+        return results
+
     def get_large_swaps(
-        self, min_usd: float = 100000, limit: int = 10
+        self, min_usd: float = 100000, limit: int = 10, fields: FieldSet = None
     ) -> List[Dict[str, Any]]:
         """Get large swaps (whale tracking)"""
-        query = """
-        query GetLargeSwaps($minUSD: String!, $limit: Int!) {
-            swaps(
-                first: $limit
-                orderBy: amountUSD
-                orderDirection: desc
-                where: { amountUSD_gt: $minUSD }
-            ) {
-                timestamp
-                pool {
-                    token0 { symbol }
-                    token1 { symbol }
-                }
-                amount0
-                amount1
-                amountUSD
-                sender
-                origin
-                transaction { id }
-            }
-        }
-        """
+        query = project(GET_LARGE_SWAPS_QUERY, fields, "Swap")
         result = self.query(query, {"minUSD": str(min_usd), "limit": limit})
         return result["swaps"]
 
-    def get_protocol_stats(self) -> Dict[str, Any]:
+    def get_large_swaps_since(
+        self,
+        min_usd: float,
+        since: int,
+        limit: int = MAX_PAGE_SIZE,
+        fields: FieldSet = None,
+    ) -> List[Dict[str, Any]]:
+        """Get swaps above min_usd at or after the since timestamp, oldest first"""
+        query = project(GET_LARGE_SWAPS_SINCE_QUERY, fields, "Swap", required=("id", "timestamp"))
+        result = self.query(query, {"minUSD": str(min_usd), "since": str(since), "first": limit})
+        return result["swaps"]
+
+    def get_large_swaps_at(
+        self,
+        min_usd: float,
+        timestamp: int,
+        after: str = "",
+        limit: int = MAX_PAGE_SIZE,
+        fields: FieldSet = None,
+    ) -> List[Dict[str, Any]]:
+        """Get swaps above min_usd at exactly timestamp with id greater than after, by id"""
+        query = project(GET_LARGE_SWAPS_AT_TIMESTAMP_QUERY, fields, "Swap", required=("id", "timestamp"))
+        result = self.query(query, {
+            "minUSD": str(min_usd), "timestamp": str(timestamp), "after": after, "first": limit,
+        })
+        return result["swaps"]
+
+    def get_protocol_stats(self, fields: FieldSet = None) -> Dict[str, Any]:
         """Get overall protocol statistics"""
-        query = """
-        query GetProtocolStats {
-            factory(id: "0x1F98431c8aD98523631AE4a59f267346ea31F984") {
-                poolCount
-                txCount
-                totalVolumeUSD
-                totalFeesUSD
-                totalValueLockedUSD
-            }
-        }
-        """
-        result = self.query(query)
+        result = self.query(project(GET_PROTOCOL_STATS_QUERY, fields, "Factory"))
         return result["factory"]
 
-    def search_tokens(self, search_term: str, limit: int = 5) -> List[Dict[str, Any]]:
+    def search_tokens(
+        self, search_term: str, limit: int = 5, fields: FieldSet = None
+    ) -> List[Dict[str, Any]]:
         """Search for tokens by symbol or name"""
-        query = """
-        query SearchTokens($search: String!, $limit: Int!) {
-            tokens(
-                where: {
-                    symbol_contains_nocase: $search
-                }
-                first: $limit
-                orderBy: volumeUSD
-                orderDirection: desc
-            ) {
-                id
-                symbol
-                name
-                volumeUSD
-                totalValueLockedUSD
-            }
-        }
-        """
+        query = project(SEARCH_TOKENS_QUERY, fields, "Token")
         result = self.query(query, {"search": search_term, "limit": limit})
         return result["tokens"]
 
 
+_APQ_ERROR_CODES = {
+    "PersistedQueryNotFound": "PERSISTED_QUERY_NOT_FOUND",
+    "PersistedQueryNotSupported": "PERSISTED_QUERY_NOT_SUPPORTED",
+}
+
+
+def _persisted_query_error(payload: Dict[str, Any]) -> Optional[str]:
+    """Return PersistedQueryNotFound/NotSupported if the server sent one"""
+    for error in payload.get("errors") or []:
+        message = str(error.get("message", "")) if isinstance(error, dict) else str(error)
+        code = error.get("extensions", {}).get("code", "") if isinstance(error, dict) else ""
+        for kind in ("PersistedQueryNotFound", "PersistedQueryNotSupported"):
+            if kind in message or code == _APQ_ERROR_CODES[kind]:
+                return kind
+    return None
+
+
+def _error_kind(error: BaseException) -> str:
+    """Short label for a failed request, used as the metrics error kind"""
+    if isinstance(error, SubgraphError) and error.status is not None:
+        return f"http_{error.status}"
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return f"http_{error.response.status_code}"
+    cause = error.__cause__ if isinstance(error, SubgraphError) else error
+    if isinstance(cause, requests.Timeout):
+        return "timeout"
+    if isinstance(cause, requests.ConnectionError):
+        return "connection"
+    return type(error).__name__
+
+
+def _retry_after(response: requests.Response) -> Optional[float]:
+    """Parse a Retry-After header given in seconds"""
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return None
+
+
 # Example usage functions
 def example_get_pool_info():
     """Example: Get USDC/WETH pool info"""
@@ -402,6 +1930,41 @@ def example_protocol_overview():
     print(f"Total Value Locked: ${float(stats['totalValueLockedUSD']):,.2f}")
 
 
+def example_query_metrics():
+    """Example: Log slow queries and print per-operation metrics"""
+    def log_slow(event):
+        if event["seconds"] > 1.0 or event["error"]:
+            print(f"slow/failed: {event['operation']} {event['seconds']:.2f}s error={event['error']}")
+
+    with UniswapSubgraph() as subgraph:
+        subgraph.add_hook(after=log_slow)
+        subgraph.get_top_pools(limit=5)
+        subgraph.get_protocol_stats()
+        subgraph.get_large_swaps(min_usd=100000, limit=5)
+
+        print("\n=== Query Metrics ===")
+        for operation, endpoints in subgraph.metrics.snapshot().items():
+            for endpoint, data in endpoints.items():
+                print(f"{operation}: {data['requests']} requests, "
+                      f"mean {data['latency']['mean'] * 1000:.0f} ms, "
+                      f"{data['bytes']['total'] / 1024:.1f} KiB, {data['error_count']} errors")
+
+
+def example_consistent_snapshot():
+    """Example: Read a pool, its swaps and its day data at one block"""
+    pool_address = "0x88e6a0c2ddd26feeb64f039a2c41296fcb3f5640"
+
+    with UniswapSubgraph() as subgraph, subgraph.snapshot() as snapshot:
+        pool = snapshot.get_pool(pool_address)
+        swaps = snapshot.get_recent_swaps(pool_address, limit=5)
+        day_data = snapshot.get_pool_day_data(pool_address, days=1)
+
+    print(f"\n=== Snapshot at block {snapshot.block} ===")
+    print(f"Pool tick: {pool['tick']}, latest swap tick: {swaps[0]['tick'] if swaps else 'n/a'}")
+    if day_data:
+        print(f"Today's close: {day_data[0]['close']}")
+
+
 if __name__ == "__main__":
     # Run examples
     try:
@@ -411,5 +1974,7 @@ if __name__ == "__main__":
         example_token_analytics()
         example_whale_watching()
         example_protocol_overview()
+        example_query_metrics()
+        example_consistent_snapshot()
     except Exception as e:
         print(f"Error: {e}")
@@ -0,0 +1,125 @@
+"""
+Incremental Swap Sync
+
+Keeps a HistoryStore up to date with each pool's swaps without re-reading
+the whole window. A per-pool high-water mark (timestamp, block, last id)
+is persisted after every successful run. The next run only asks the
+subgraph for swaps at or after that timestamp, drops the ones already
+stored at the boundary, and appends the rest, so each run costs
+O(new swaps).
+"""
+
+import time
+from typing import Any, Dict, List, Optional
+
+from subgraph_query import MAX_PAGE_SIZE, UniswapSubgraph
+from history_store import DEFAULT_FINALITY_SECONDS, HistoryStore
+
+# How far back the first sync of a pool reaches when no start is given
+DEFAULT_BACKFILL_SECONDS = 86400
+
+
+class SwapSync:
+    """Append new swaps for tracked pools to a HistoryStore
+
+    Only swaps older than finality_seconds are synced, which keeps the store
+    free of records that a reorg could still change. Pass 0 to sync up to
+    the latest indexed swap.
+    """
+
+    def __init__(
+        self,
+        subgraph: UniswapSubgraph,
+        store: HistoryStore,
+        finality_seconds: int = DEFAULT_FINALITY_SECONDS,
+        page_size: int = MAX_PAGE_SIZE,
+    ):
+        self.subgraph = subgraph
+        self.store = store
+        self.finality_seconds = finality_seconds
+        self.page_size = page_size
+
+    def sync(self, pool_address: str, start: Optional[int] = None) -> Dict[str, Any]:
+        """Fetch and store swaps newer than the pool's high-water mark
+
+        start is only used on the first sync of a pool (defaults to one day
+        ago). Returns the number of new swaps and the updated high-water mark.
+        """
+        pool = pool_address.lower()
+        mark = self.store.high_water_mark(pool)
+        if mark is not None:
+            since = mark["timestamp"]
+        elif start is not None:
+            since = start
+        else:
+            since = int(time.time()) - DEFAULT_BACKFILL_SECONDS
+        before = int(time.time()) - self.finality_seconds + 1
+
+        # Swaps at the boundary timestamp may already be stored
+        seen = set(self.store.swap_ids_at(pool, since)) if mark is not None else set()
+
+        new_count = 0
+        newest = mark
+        batch: List[Dict[str, Any]] = []
+        for swap in self.subgraph.iter_swaps(pool, since=since, before=before, page_size=self.page_size):
+            if swap["id"] in seen:
+                continue
+            batch.append(swap)
+            newest = _newer(newest, swap)
+            if len(batch) >= self.page_size:
+                self.store.add_swaps(pool, batch)
+                new_count += len(batch)
+                batch = []
+        if batch:
+            self.store.add_swaps(pool, batch)
+            new_count += len(batch)
+
+        # Swaps arrive newest first, so the mark only moves once all are stored
+        if newest is not None and newest is not mark:
+            self.store.set_high_water_mark(pool, newest["timestamp"], newest["block"], newest["last_id"])
+
+        return {"pool": pool, "new_swaps": new_count, "high_water_mark": newest}
+
+    def sync_all(self, pool_addresses: List[str], start: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Sync several pools one after another"""
+        return [self.sync(pool_address, start) for pool_address in pool_addresses]
+
+
+def _newer(mark: Optional[Dict[str, Any]], swap: Dict[str, Any]) -> Dict[str, Any]:
+    """Return whichever of the mark and the swap is later in (timestamp, block, id) order"""
+    candidate = {
+        "timestamp": int(swap["timestamp"]),
+        "block": int(swap["transaction"]["blockNumber"]),
+        "last_id": swap["id"],
+    }
+    if mark is None:
+        return candidate
+    key = (candidate["timestamp"], candidate["block"], candidate["last_id"])
+    if key > (mark["timestamp"], mark["block"], mark["last_id"]):
+        return candidate
+    return mark
+
+
+# Example usage functions
+def example_hourly_sync():
+    """Example: Keep a local swap log current for a few pools"""
+    pools = [
+        "0x88e6a0c2ddd26feeb64f039a2c41296fcb3f5640",  # USDC/WETH 0.05%
+        "0x8ad599c3a0ff1de082011efddc58f1908eb6e6d8",  # USDC/WETH 0.3%
+    ]
+
+    with UniswapSubgraph() as subgraph, HistoryStore() as store:
+        syncer = SwapSync(subgraph, store)
+
+        print("=== Swap Sync ===")
+        for result in syncer.sync_all(pools):
+            mark = result["high_water_mark"]
+            position = f"block {mark['block']}" if mark else "no swaps yet"
+            print(f"{result['pool']}: +{result['new_swaps']} swaps ({position})")
+
+
+if __name__ == "__main__":
+    try:
+        example_hourly_sync()
+    except Exception as e:
+        print(f"Error: {e}")
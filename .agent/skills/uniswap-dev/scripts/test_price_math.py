@@ -0,0 +1,44 @@
+"""
+Tests for the exact tick math in price_math
+
+Requires: pip install pytest numpy requests
+"""
+
+import pytest
+
+from columnar import BigUIntColumn
+from price_math import (
+    MAX_TICK,
+    MIN_TICK,
+    get_sqrt_ratio_at_tick,
+    get_tick_at_sqrt_ratio,
+    ticks_from_sqrt,
+)
+
+TICKS = (
+    list(range(-2000, 2001))
+    + list(range(MIN_TICK, MIN_TICK + 500))
+    + list(range(MAX_TICK - 500, MAX_TICK))
+    + list(range(-887000, 887001, 997))
+)
+
+
+def _column(values):
+    return BigUIntColumn.from_values(values, 160)
+
+
+def test_ticks_from_sqrt_round_trips_tick_boundaries():
+    ratios = [get_sqrt_ratio_at_tick(tick) for tick in TICKS]
+    assert ticks_from_sqrt(_column(ratios)).tolist() == TICKS
+
+
+def test_ticks_from_sqrt_just_below_boundaries():
+    ratios = [get_sqrt_ratio_at_tick(tick) - 1 for tick in TICKS if tick > MIN_TICK]
+    expected = [tick - 1 for tick in TICKS if tick > MIN_TICK]
+    assert ticks_from_sqrt(_column(ratios)).tolist() == expected
+
+
+@pytest.mark.parametrize("tick", [MIN_TICK, -1, 0, 1, 200_000, MAX_TICK - 1])
+def test_ticks_from_sqrt_matches_scalar(tick):
+    ratio = get_sqrt_ratio_at_tick(tick)
+    assert ticks_from_sqrt(_column([ratio]))[0] == get_tick_at_sqrt_ratio(ratio) == tick
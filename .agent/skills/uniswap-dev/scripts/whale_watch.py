@@ -0,0 +1,219 @@
+"""
+Live Whale Watching
+
+Long-running watcher that polls the subgraph for swaps above a USD
+threshold and emits each one exactly once, to a callback or an asyncio
+queue. The poll interval follows the observed rate of large swaps: it
+tightens while whales are active and backs off when the market is quiet
+or the subgraph is failing. Each poll is one request from a timestamp
+cursor (plus id-paged requests when a full page shares one timestamp),
+and duplicates at the cursor boundary are dropped with a bounded
+seen-set, so memory and request rate stay flat however long it runs.
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+
+from subgraph_query import SubgraphError, UniswapSubgraph
+
+# Polling bounds in seconds; the adaptive interval stays within them
+DEFAULT_MIN_INTERVAL = 5.0
+DEFAULT_MAX_INTERVAL = 120.0
+
+DEFAULT_MIN_USD = 1_000_000
+DEFAULT_PAGE_SIZE = 100
+DEFAULT_SEEN_SIZE = 10_000
+
+# Weight of the latest poll in the swap-rate moving average
+RATE_SMOOTHING = 0.3
+
+
+class SeenSet:
+    """Insertion-ordered set that forgets its oldest entries beyond max_size"""
+
+    def __init__(self, max_size: int = DEFAULT_SEEN_SIZE):
+        self.max_size = max_size
+        self._items: "OrderedDict[str, None]" = OrderedDict()
+
+    def add(self, item: str) -> bool:
+        """Add item; returns False if it was already present"""
+        if item in self._items:
+            return False
+        self._items[item] = None
+        if len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+        return True
+
+    def __contains__(self, item: str) -> bool:
+        return item in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class WhaleWatcher:
+    """Poll for new large swaps and hand each one to a consumer once
+
+    The cursor is the newest swap timestamp seen, so a swap is only missed
+    if it is indexed with a timestamp older than swaps already reported.
+    The next interval aims to find target_per_poll new swaps, based on a
+    moving average of the large-swap rate. It drops to min_interval when a
+    poll fills its page and doubles (up to max_interval) after a failure.
+    """
+
+    def __init__(
+        self,
+        subgraph: UniswapSubgraph,
+        min_usd: float = DEFAULT_MIN_USD,
+        callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        since: Optional[int] = None,
+        min_interval: float = DEFAULT_MIN_INTERVAL,
+        max_interval: float = DEFAULT_MAX_INTERVAL,
+        target_per_poll: float = 1.0,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        seen_size: int = DEFAULT_SEEN_SIZE,
+    ):
+        self.subgraph = subgraph
+        self.min_usd = min_usd
+        self.callback = callback
+        self.cursor = since if since is not None else int(time.time())
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.target_per_poll = target_per_poll
+        self.page_size = page_size
+        self.seen = SeenSet(seen_size)
+        self.interval = min_interval
+        self.rate = 0.0  # large swaps per second (moving average)
+        self.stats = {"polls": 0, "emitted": 0, "duplicates": 0, "errors": 0}
+        self._last_poll: Optional[float] = None
+
+    def poll(self) -> List[Dict[str, Any]]:
+        """Fetch once, advance the cursor and interval, and return the new swaps"""
+        now = time.monotonic()
+        swaps = self.subgraph.get_large_swaps_since(self.min_usd, self.cursor, self.page_size)
+        self.stats["polls"] += 1
+        page_full = len(swaps) >= self.page_size
+        stuck = page_full and int(swaps[-1]["timestamp"]) <= self.cursor
+        if stuck:
+            # The whole page shares the cursor timestamp, so the cursor cannot
+            # move: drain that timestamp by id, then step past it
+            swaps = self._drain_timestamp(self.cursor)
+
+        new = []
+        for swap in swaps:
+            if self.seen.add(swap["id"]):
+                new.append(swap)
+            else:
+                self.stats["duplicates"] += 1
+        if stuck:
+            self.cursor += 1
+        elif swaps:
+            self.cursor = max(self.cursor, int(swaps[-1]["timestamp"]))
+
+        self._adapt(len(new), now, page_full)
+        return new
+
+    def _drain_timestamp(self, timestamp: int) -> List[Dict[str, Any]]:
+        """Every large swap at exactly timestamp, paging by id"""
+        swaps: List[Dict[str, Any]] = []
+        after = ""
+        while True:
+            page = self.subgraph.get_large_swaps_at(self.min_usd, timestamp, after, self.page_size)
+            swaps.extend(page)
+            if len(page) < self.page_size:
+                return swaps
+            after = page[-1]["id"]
+
+    def _adapt(self, new_count: int, now: float, page_full: bool) -> None:
+        """Update the swap-rate average and pick the next poll interval"""
+        if self._last_poll is not None:
+            elapsed = max(now - self._last_poll, 1e-3)
+            self.rate = RATE_SMOOTHING * (new_count / elapsed) + (1 - RATE_SMOOTHING) * self.rate
+        self._last_poll = now
+
+        if page_full:
+            interval = self.min_interval  # more swaps are waiting behind this page
+        elif self.rate > 0:
+            interval = self.target_per_poll / self.rate
+        elif new_count:
+            interval = self.interval  # first poll: swaps found, but no rate yet
+        else:
+            interval = self.interval * 2
+        self.interval = min(self.max_interval, max(self.min_interval, interval))
+
+    def _poll_safely(self) -> List[Dict[str, Any]]:
+        """poll(), backing off instead of raising when the subgraph fails"""
+        try:
+            return self.poll()
+        except (SubgraphError, requests.RequestException):
+            self.stats["errors"] += 1
+            self.interval = min(self.max_interval, self.interval * 2)
+            return []
+
+    def run(self, stop: Optional[threading.Event] = None, max_polls: Optional[int] = None) -> None:
+        """Poll until stop is set (or max_polls), passing new swaps to the callback"""
+        if self.callback is None:
+            raise ValueError("run() needs a callback; use run_async() to feed a queue")
+        stop = stop or threading.Event()
+        polls = 0
+        while not stop.is_set() and (max_polls is None or polls < max_polls):
+            for swap in self._poll_safely():
+                self.callback(swap)
+                self.stats["emitted"] += 1
+            polls += 1
+            stop.wait(self.interval)
+
+    async def run_async(
+        self,
+        queue: "asyncio.Queue[Dict[str, Any]]",
+        stop: Optional[asyncio.Event] = None,
+        max_polls: Optional[int] = None,
+    ) -> None:
+        """Poll from a worker thread until stop is set, putting new swaps on queue
+
+        A bounded queue applies backpressure: polling pauses while it is full.
+        """
+        loop = asyncio.get_running_loop()
+        stop = stop or asyncio.Event()
+        polls = 0
+        while not stop.is_set() and (max_polls is None or polls < max_polls):
+            for swap in await loop.run_in_executor(None, self._poll_safely):
+                await queue.put(swap)
+                self.stats["emitted"] += 1
+            polls += 1
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+
+# Example usage functions
+def example_watch_whales():
+    """Example: Print every new swap above $1M as it is indexed"""
+    def report(swap):
+        pool = swap["pool"]
+        timestamp = datetime.fromtimestamp(int(swap["timestamp"]))
+        print(f"{timestamp} {pool['token0']['symbol']}/{pool['token1']['symbol']} "
+              f"${float(swap['amountUSD']):,.0f} from {swap['origin']}")
+
+    with UniswapSubgraph() as subgraph:
+        watcher = WhaleWatcher(subgraph, min_usd=1_000_000, callback=report,
+                               since=int(time.time()) - 3600)
+        print("=== Watching for whales (Ctrl+C to stop) ===")
+        try:
+            watcher.run()
+        except KeyboardInterrupt:
+            print(f"\nStats: {watcher.stats}, next poll in {watcher.interval:.0f}s")
+
+
+if __name__ == "__main__":
+    try:
+        example_watch_whales()
+    except Exception as e:
+        print(f"Error: {e}")